@@ -0,0 +1,77 @@
+"""
+Benchmark of article body assembly against the previous += loop.
+
+Long articles are taken from saved batch or archive files (any JSON Lines
+files with a "raksts" field), split back into paragraph sized chunks.
+Without files, synthetic long-read articles are used.
+
+Usage: python -m benchmarks.bench_article_body [--number N] [FILE ...]
+"""
+
+import argparse
+import timeit
+
+from grabeklis.fileio import iter_records
+from grabeklis.extract import join_paragraphs, tidy_string
+
+
+def join_paragraphs_concat(paragraphs: list[str]) -> str:
+    """Article body assembly before join_paragraphs"""
+    article = ""
+    for paragraph in paragraphs:
+        article += " " + paragraph
+
+    return tidy_string(article)
+
+
+def load_articles(paths: list[str], min_chars: int = 10_000) -> list[list[str]]:
+    articles = []
+    for path in paths:
+        for record in iter_records(path):
+            text = record.get("raksts") or ""
+            if len(text) >= min_chars:
+                # Sentences stand in for paragraphs, with some of the
+                # whitespace noise found in the page source
+                articles.append([f"\n {sentence}.\xa0" for sentence in text.split(". ")])
+    return articles
+
+
+def synthetic_articles(num_articles: int = 20, num_paragraphs: int = 400) -> list[list[str]]:
+    paragraph = (
+        "\n  Saeimas deputāti\xa0ceturtdien   galīgajā lasījumā pieņēma grozījumus "
+        "likumā\xa0– tie stāsies spēkā\n nākamā gada 1.\xa0janvārī.  "
+    )
+    return [[paragraph] * num_paragraphs for _ in range(num_articles)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--min-chars", type=int, default=10_000)
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args()
+
+    articles = load_articles(args.files, args.min_chars) if args.files else synthetic_articles()
+    if len(articles) == 0:
+        raise SystemExit("No long articles found")
+
+    for paragraphs in articles:
+        assert join_paragraphs(paragraphs) == join_paragraphs_concat(paragraphs)
+
+    num_chars = sum(len(p) for paragraphs in articles for p in paragraphs)
+    print(f"{len(articles)} articles, {num_chars / len(articles):.0f} chars on average")
+
+    for name, func in [("concat", join_paragraphs_concat), ("join", join_paragraphs)]:
+        seconds = min(
+            timeit.repeat(
+                lambda: [func(paragraphs) for paragraphs in articles],
+                number=args.number,
+                repeat=3,
+            )
+        )
+        per_article = seconds / args.number / len(articles)
+        print(f"{name:>8}: {per_article * 1e6:8.2f} us/article")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark of article extraction against the previous full-document XPath
+queries, on the HTML fixtures in tests/fixtures.
+
+Usage: python -m benchmarks.bench_extract [--number N] [FILE ...]
+"""
+
+import argparse
+import timeit
+import traceback
+
+from datetime import datetime
+from pathlib import Path
+
+from scrapy.http import HtmlResponse
+
+from grabeklis import utils
+from grabeklis.items import LSMArticle
+from grabeklis.extract import (
+    IGNORE_ARTICLE_CATEGORIES,
+    join_paragraphs,
+    prepare_item_from_response,
+    tidy_string,
+)
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def prepare_item_from_response_xpath(response, dt_start: datetime):
+    """prepare_item_from_response before the single-traversal extraction"""
+
+    try:
+        # First check article category.
+        # Some contain mostly audio, video or pictures. Those are excluded.
+        # Paid articles are also excluded.
+        category = response.xpath('//div[@class="info-item category"]/a/text()').get()
+        category = tidy_string(category)
+
+        if category in IGNORE_ARTICLE_CATEGORIES:
+            raise ValueError(f"Article category '{category}' in ignore list")
+
+        publish_date = response.xpath('//div[@class="info-item time"]/text()').get()
+        publish_date = tidy_string(publish_date)
+
+        # This year's dates don't have year, yesterday's date say yesterday etc.
+        publish_date = utils.parse_datetime(publish_date, dt_start)
+        publish_date = publish_date.strftime("%Y-%m-%d %H:%M")
+
+        # Main article <div>
+        article_div = response.xpath('//div[@class="article__body"]')
+
+        # Select text from <p> or <blockqoute> elements in article <div>
+        article_as_list = article_div.xpath(
+            "./p/text()|./blockquote/p/text()"
+        ).extract()
+
+        # Convert from list of strings to a single string,
+        # with whitespace after end of sentence
+        article = join_paragraphs(article_as_list)
+
+        # Sometimes there is a <p> element inside <h2> with the text
+        lead_div = response.xpath('//h2[@class="article-lead"]')
+
+        lead = lead_div.xpath("./text()|./following-sibling::p/text()").get()
+        if lead is None or len(lead) < 2:  # can be ' '
+            lead_parts = lead_div.xpath(".//text()|./following-sibling::p//text()").extract()
+            lead = " ".join(lead_parts).replace("  ", " ").strip()
+
+        lead = tidy_string(lead)
+
+        title = response.xpath('//h1[@class="article-title"]/text()').get()
+        title = tidy_string(title)
+
+        url = response.url
+
+        item = LSMArticle(
+            url=url,
+            datums=publish_date,
+            kategorija=category,
+            virsraksts=title,
+            kopsavilkums=lead,
+            raksts=article,
+        )
+
+    except Exception:
+        err = traceback.format_exc()
+        return LSMArticle(url=response.url, error=err)
+
+    return item
+
+
+def load_responses(paths: list[Path]) -> list[HtmlResponse]:
+    responses = []
+    for path in paths:
+        url = f"https://www.lsm.lv/raksts/{path.stem}/"
+        responses.append(HtmlResponse(url, body=path.read_bytes(), encoding="utf-8"))
+    return responses
+
+
+def without_traceback(item: LSMArticle) -> dict:
+    # Tracebacks of failed items differ by line numbers
+    item = dict(item)
+    if "error" in item:
+        item["error"] = item["error"].strip().splitlines()[-1]
+    return item
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("files", nargs="*", type=Path)
+    args = parser.parse_args()
+
+    paths = args.files or sorted(FIXTURES_DIR.glob("*.html"))
+    dt_start = datetime(2024, 3, 15, 12, 0)
+
+    def run(func):
+        # Fresh responses, so every run parses its documents again
+        return [func(response, dt_start) for response in load_responses(paths)]
+
+    old_items = [without_traceback(item) for item in run(prepare_item_from_response_xpath)]
+    new_items = [without_traceback(item) for item in run(prepare_item_from_response)]
+    assert old_items == new_items
+
+    # Documents parsed up front, to time the extraction alone
+    parsed = load_responses(paths)
+    for response in parsed:
+        response.selector
+
+    def run_parsed(func):
+        return [func(response, dt_start) for response in parsed]
+
+    funcs = [("xpath", prepare_item_from_response_xpath), ("single-pass", prepare_item_from_response)]
+
+    print(f"{len(paths)} pages")
+    for title, runner in [("parse + extract", run), ("extract only", run_parsed)]:
+        print(title)
+        for name, func in funcs:
+            seconds = min(timeit.repeat(lambda: runner(func), number=args.number, repeat=3))
+            print(f"{name:>12}: {seconds / args.number / len(paths) * 1e6:8.2f} us/page")
+
+
+if __name__ == "__main__":
+    main()
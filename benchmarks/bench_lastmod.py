@@ -0,0 +1,55 @@
+"""
+Micro-benchmark of sitemap lastmod parsing, strptime against parse_lastmod.
+
+Usage: python -m benchmarks.bench_lastmod [--entries N]
+"""
+
+import random
+import argparse
+import timeit
+
+from datetime import datetime, timedelta
+
+from grabeklis.utils import LASTMOD_FORMAT, parse_lastmod
+
+
+def sitemap_lastmods(num_entries: int) -> list[str]:
+    """Lastmods of a few years of articles, summer and winter time offsets."""
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1)
+
+    lastmods = []
+    for _ in range(num_entries):
+        dt = start + timedelta(seconds=rng.randrange(4 * 365 * 24 * 3600))
+        offset = "+03:00" if 4 <= dt.month <= 10 else "+02:00"
+        lastmods.append(dt.strftime("%Y-%m-%dT%H:%M:%S") + offset)
+
+    return lastmods
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=200_000)
+    args = parser.parse_args()
+
+    lastmods = sitemap_lastmods(args.entries)
+
+    for lastmod in lastmods:
+        expected = datetime.strptime(lastmod, LASTMOD_FORMAT)
+        answer = parse_lastmod(lastmod)
+        assert answer == expected and answer.tzinfo == expected.tzinfo
+
+    funcs = [
+        ("strptime", lambda s: datetime.strptime(s, LASTMOD_FORMAT)),
+        ("parse_lastmod", parse_lastmod),
+    ]
+    for name, func in funcs:
+        seconds = min(timeit.repeat(lambda: [func(s) for s in lastmods], number=1, repeat=3))
+        print(
+            f"{name:>14}: {seconds:6.3f} s for {len(lastmods)} entries, "
+            f"{seconds / len(lastmods) * 1e6:6.2f} us/entry"
+        )
+
+
+if __name__ == "__main__":
+    main()
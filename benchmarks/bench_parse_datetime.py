@@ -0,0 +1,103 @@
+"""
+Micro-benchmark of publish date parsing: the previous uncached
+parse_datetime, the cached one, and parse_datetimes over a column with
+one download day or a download day per row.
+
+Usage: python -m benchmarks.bench_parse_datetime [--articles N] [--distinct N]
+"""
+
+import random
+import argparse
+import timeit
+
+from datetime import datetime, timedelta
+
+from grabeklis import utils
+
+
+def parse_datetime_uncached(datums: str, dt: datetime):
+    """parse_datetime before caching"""
+    str_parts = datums.split(",")
+
+    if len(str_parts) == 3:
+        day, month_str = str_parts[0].split(". ")
+        month = utils.LV_MONTH_NUMBERS[month_str]
+        year = str_parts[1]
+        hour, min = str_parts[2].replace(" ", "").split(":")
+
+    else:
+        hour, min = str_parts[1].replace(" ", "").split(":")
+
+        if str_parts[0].lower() == "vakar":
+            yesterday = dt - timedelta(days=1)
+            day, month, year = yesterday.day, yesterday.month, yesterday.year
+
+        elif str_parts[0].lower() == "šodien":
+            day, month, year = dt.day, dt.month, dt.year
+
+        else:
+            day, month_str = str_parts[0].split(". ")
+            month = utils.LV_MONTH_NUMBERS[month_str]
+            year = dt.year
+
+    return datetime(int(year), int(month), int(day), int(hour), int(min))
+
+
+def publish_dates(num_articles: int, num_distinct: int) -> list[str]:
+    """
+    Publish dates of a crawl: today, yesterday, this year and older,
+    with articles often published at the same minute.
+    """
+    rng = random.Random(0)
+    months = list(utils.LV_MONTH_NUMBERS)
+
+    dates = []
+    for _ in range(num_distinct):
+        time = f"{rng.randrange(24)}:{rng.randrange(60):02d}"
+        kind = rng.randrange(4)
+        if kind == 0:
+            dates.append(f"Šodien, {time}")
+        elif kind == 1:
+            dates.append(f"Vakar, {time}")
+        elif kind == 2:
+            dates.append(f"{rng.randrange(1, 29)}. {rng.choice(months)}, {time}")
+        else:
+            year = rng.randrange(2010, 2024)
+            dates.append(f"{rng.randrange(1, 29)}. {rng.choice(months)}, {year}, {time}")
+
+    return rng.choices(dates, k=num_articles)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=500)
+    args = parser.parse_args()
+
+    dt = datetime(2024, 3, 15, 12, 0)
+    dates = publish_dates(args.articles, args.distinct)
+
+    # Archived articles, scraped over a month
+    days = [dt - timedelta(days=i % 30) for i in range(len(dates))]
+
+    expected = [parse_datetime_uncached(s, dt) for s in dates]
+    assert [utils.parse_datetime(s, dt) for s in dates] == expected
+    assert utils.parse_datetimes(dates, dt) == expected
+    assert utils.parse_datetimes(dates, days) == [
+        parse_datetime_uncached(s, day) for s, day in zip(dates, days)
+    ]
+
+    funcs = [
+        ("uncached", lambda: [parse_datetime_uncached(s, dt) for s in dates]),
+        ("parse_datetime", lambda: [utils.parse_datetime(s, dt) for s in dates]),
+        ("parse_datetimes", lambda: utils.parse_datetimes(dates, dt)),
+        ("per-row days", lambda: utils.parse_datetimes(dates, days)),
+    ]
+    for name, func in funcs:
+        utils._parse_datetime.cache_clear()
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print(f"{name:>15}: {seconds / len(dates) * 1e6:6.2f} us/article")
+
+
+if __name__ == "__main__":
+    main()
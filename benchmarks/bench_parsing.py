@@ -0,0 +1,68 @@
+"""
+Article extraction throughput in the crawler process and in worker pools
+of increasing size, on the HTML fixtures in tests/fixtures.
+
+Usage: python -m benchmarks.bench_parsing [--pages N] [--workers 1 2 4]
+"""
+
+import asyncio
+import argparse
+import time
+
+from datetime import datetime
+from pathlib import Path
+
+from scrapy.http import HtmlResponse
+
+from grabeklis.extract import prepare_item_from_response
+from grabeklis.parsing import ProcessParser
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def load_responses(num_pages: int) -> list[HtmlResponse]:
+    paths = sorted(FIXTURES_DIR.glob("*.html"))
+    bodies = [path.read_bytes() for path in paths]
+
+    return [
+        HtmlResponse(f"https://www.lsm.lv/raksts/a{i}/", body=bodies[i % len(bodies)], encoding="utf-8")
+        for i in range(num_pages)
+    ]
+
+
+async def extract_all(parser: ProcessParser, responses, dt_start):
+    return await asyncio.gather(*(parser.extract(r, dt_start) for r in responses))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    dt_start = datetime(2024, 3, 15, 12, 0)
+    responses = load_responses(args.pages)
+
+    t0 = time.perf_counter()
+    expected = [dict(prepare_item_from_response(r, dt_start)) for r in load_responses(args.pages)]
+    seconds = time.perf_counter() - t0
+    print(f"in-process: {args.pages / seconds:8.0f} pages/s")
+
+    for workers in args.workers:
+        pool = ProcessParser(workers, max_pending=4 * workers)
+        try:
+            # Workers start on first use, don't count that
+            asyncio.run(extract_all(pool, responses[: workers * 2], dt_start))
+
+            t0 = time.perf_counter()
+            items = asyncio.run(extract_all(pool, responses, dt_start))
+            seconds = time.perf_counter() - t0
+        finally:
+            pool.close()
+
+        assert [dict(item) for item in items] == expected
+        print(f"{workers:>2} workers: {args.pages / seconds:8.0f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark of tidy_string against the previous three-regex version.
+
+Usage: python -m benchmarks.bench_tidy_string [--number N]
+"""
+
+import re
+import argparse
+import timeit
+
+from grabeklis.extract import tidy_string
+
+
+def tidy_string_regex(s: str) -> str:
+    """tidy_string before the single-pass rewrite"""
+    s = re.sub(r"\n", "", s)
+    s = re.sub(r"\xa0", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+
+    if len(s) == 0:
+        raise RuntimeError("No information found.")
+
+    return s
+
+
+def article_strings() -> list[str]:
+    """Strings tidied for a typical article: category, time, lead, title, body."""
+    paragraph = (
+        "\n  Saeimas deputāti\xa0ceturtdien   galīgajā lasījumā pieņēma grozījumus "
+        "likumā\xa0– tie stāsies spēkā\n nākamā gada 1.\xa0janvārī.  "
+    )
+    body = " ".join([paragraph] * 60)
+
+    return [
+        "\n  Latvijā\n ",
+        "\n 5. jūnijs, 2013, 13:00\n",
+        paragraph * 2,
+        "\n Saeima pieņem\xa0grozījumus  likumā \n",
+        body,
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20_000)
+    args = parser.parse_args()
+
+    strings = article_strings()
+    assert [tidy_string(s) for s in strings] == [tidy_string_regex(s) for s in strings]
+
+    for name, func in [("regex", tidy_string_regex), ("single-pass", tidy_string)]:
+        seconds = min(
+            timeit.repeat(lambda: [func(s) for s in strings], number=args.number, repeat=3)
+        )
+        print(f"{name:>12}: {seconds / args.number * 1e6:8.2f} us/article")
+
+
+if __name__ == "__main__":
+    main()
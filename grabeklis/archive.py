@@ -0,0 +1,335 @@
+import io
+import os
+import json
+import sqlite3
+
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+try:
+    from grabeklis.fileio import (
+        LimitedReader,
+        compress_stream,
+        compression_suffix,
+        decompress_stream,
+    )
+except ModuleNotFoundError:
+    from fileio import LimitedReader, compress_stream, compression_suffix, decompress_stream
+
+
+class KeyIndex:
+    """
+    Record keys of an archive, stored in SQLite.
+
+    Keys are looked up through the primary key index, so checking the keys
+    of a run costs the same no matter how large the archive is. The index
+    also stores how many archive records it covers, which tells whether it
+    is in sync with the archive manifest.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._conn = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Archiving runs in a worker thread once crawling is done
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)"
+            )
+            self._conn.commit()
+
+        return self._conn
+
+    def __contains__(self, key: str) -> bool:
+        cursor = self.conn.execute("SELECT 1 FROM keys WHERE key = ?", (key,))
+        return cursor.fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        for (key,) in self.conn.execute("SELECT key FROM keys"):
+            yield key
+
+    @property
+    def num_records(self) -> int:
+        """Number of archive records whose keys are in the index."""
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'num_records'").fetchone()
+        return 0 if row is None else row[0]
+
+    def add(self, keys: Iterable[str], num_records: int) -> None:
+        """Add keys of appended records, in a single transaction."""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO keys (key) VALUES (?)", ((key,) for key in keys)
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('num_records', ?)",
+            (num_records,),
+        )
+        self.conn.commit()
+
+    def replace(self, keys: Iterable[str], num_records: int) -> None:
+        """Replace all stored keys."""
+        self.conn.execute("DELETE FROM keys")
+        self.add(keys, num_records)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class JsonlArchive:
+    """
+    Segmented, append-only JSON Lines archive.
+
+    Records live in numbered segment files inside a directory. A small
+    manifest keeps track of the segments, their committed sizes and the
+    runs already merged, so adding a run only appends its new records
+    instead of rewriting the whole archive.
+
+    With a key function, the archive also keeps a persistent index of
+    record keys, so duplicates can be detected without reading records.
+    The index is updated after the manifest and rebuilt from the records
+    if an interrupted append left it behind.
+
+    Segments can be gzip or zstd compressed. Every append adds a new
+    compressed member (frame) to the segment, so appends never rewrite
+    existing data either. Segments of different compression can be mixed,
+    changing the compression starts a new segment.
+
+    Directory layout:
+        <archive>/manifest.json
+        <archive>/index.sqlite3 (only with a key function)
+        <archive>/segment_000000.jsonl
+        <archive>/segment_000001.jsonl.gz (compressed)
+        ...
+    """
+
+    manifest_name = "manifest.json"
+    index_name = "index.sqlite3"
+    segment_prefix = "segment"
+    segment_suffix = ".jsonl"
+
+    # Start a new segment once the current one grows past this size on disk
+    segment_max_bytes = 64 * 1024 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        segment_max_bytes: int | None = None,
+        key_func: Callable[[dict], str] | None = None,
+        compression: str | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.manifest_path = self.path / self.manifest_name
+        self.index_path = self.path / self.index_name
+
+        if segment_max_bytes is not None:
+            self.segment_max_bytes = segment_max_bytes
+
+        self.key_func = key_func
+
+        # Compression of new segments, fails early if unsupported
+        self.compression = compression
+        compression_suffix(compression)
+
+        self._manifest = None
+        self._keys = None if key_func is None else KeyIndex(self.index_path)
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    @property
+    def manifest(self) -> dict:
+        if self._manifest is None:
+            if self.exists():
+                with open(self.manifest_path, "r", encoding="utf-8") as file:
+                    self._manifest = json.load(file)
+            else:
+                self._manifest = {"version": 1, "num_records": 0, "segments": [], "runs": []}
+        return self._manifest
+
+    def __len__(self) -> int:
+        return self.manifest["num_records"]
+
+    def has_run(self, run_name: str) -> bool:
+        return run_name in self.manifest["runs"]
+
+    @property
+    def keys(self) -> KeyIndex:
+        """Keys of all committed records, looked up in the index."""
+        if self._keys is None:
+            raise RuntimeError("Archive has no key function")
+
+        # Archive created without an index (e.g. by migration), or an
+        # append interrupted after saving the manifest
+        if self._keys.num_records != len(self):
+            self._rebuild_index()
+
+        return self._keys
+
+    def iter_records(self) -> Iterator[dict]:
+        """Stream committed records segment by segment."""
+        for segment in self.manifest["segments"]:
+            segment_path = self.path / segment["name"]
+
+            # Anything past the committed size was never acknowledged
+            # in the manifest (e.g. an interrupted append) and is ignored
+            with open(segment_path, "rb") as file:
+                reader = io.BufferedReader(LimitedReader(file, segment["num_bytes"]))
+                stream = decompress_stream(reader, segment.get("compression"))
+                for line in stream:
+                    yield json.loads(line)
+
+    def append(self, records: Iterable[dict], run_name: str | None = None) -> int:
+        """
+        Append records to the archive and commit them in the manifest.
+
+        Args:
+            records (Iterable[dict]): Records to append.
+            run_name (str | None): Run the records come from, remembered
+                so that the same run can't be merged twice.
+
+        Returns:
+            int: Number of records appended.
+        """
+        manifest = self.manifest
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        new_keys = []
+        if self.key_func is not None:
+            # Brought in sync before the manifest changes
+            keys = self.keys
+
+        segment = self._writable_segment()
+        segment_path = self.path / segment["name"]
+
+        # Drop bytes of an interrupted append before writing after them
+        if segment_path.exists() and segment_path.stat().st_size > segment["num_bytes"]:
+            os.truncate(segment_path, segment["num_bytes"])
+
+        num_appended = 0
+        file, stream = self._open_segment(segment)
+        try:
+            for record in records:
+                # Compressed output reaches the file in blocks, so the
+                # size on disk lags behind a little
+                if file.tell() >= self.segment_max_bytes:
+                    self._close_segment(segment, file, stream)
+                    file.close()
+                    segment = self._new_segment()
+                    file, stream = self._open_segment(segment)
+
+                line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+                stream.write(line)
+
+                if self.key_func is not None:
+                    new_keys.append(self.key_func(record))
+
+                segment["num_records"] += 1
+                num_appended += 1
+
+            self._close_segment(segment, file, stream)
+        finally:
+            file.close()
+
+        manifest["num_records"] += num_appended
+        if run_name is not None and run_name not in manifest["runs"]:
+            manifest["runs"].append(run_name)
+
+        self._save_manifest()
+
+        if self.key_func is not None:
+            keys.add(new_keys, manifest["num_records"])
+
+        return num_appended
+
+    def add_runs(self, run_names: Iterable[str]) -> None:
+        """Remember runs as merged, e.g. when rebuilding an archive."""
+        manifest = self.manifest
+        manifest["runs"].extend(name for name in run_names if name not in manifest["runs"])
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._save_manifest()
+
+    def close(self) -> None:
+        if self._keys is not None:
+            self._keys.close()
+
+    def _rebuild_index(self) -> None:
+        keys = (self.key_func(record) for record in self.iter_records())
+        self._keys.replace(keys, len(self))
+
+    def _open_segment(self, segment: dict):
+        file = open(self.path / segment["name"], "ab")
+        return file, compress_stream(file, segment.get("compression"))
+
+    def _close_segment(self, segment: dict, file, stream) -> None:
+        # Finishes the compressed member, the file stays open
+        stream.close()
+
+        file.flush()
+        os.fsync(file.fileno())
+
+        # Committed size is the size on disk, so compressed members
+        # written after it can be told apart after an interruption
+        segment["num_bytes"] = file.tell()
+
+    def _writable_segment(self) -> dict:
+        segments = self.manifest["segments"]
+        if (
+            len(segments) == 0
+            or segments[-1]["num_bytes"] >= self.segment_max_bytes
+            or segments[-1].get("compression") != self.compression
+        ):
+            return self._new_segment()
+        return segments[-1]
+
+    def _new_segment(self) -> dict:
+        segments = self.manifest["segments"]
+        suffix = self.segment_suffix + compression_suffix(self.compression)
+        name = f"{self.segment_prefix}_{len(segments):06d}{suffix}"
+        segment = {"name": name, "num_records": 0, "num_bytes": 0}
+        if self.compression is not None:
+            segment["compression"] = self.compression
+        segments.append(segment)
+        return segment
+
+    def _save_manifest(self) -> None:
+        # Write to a temporary file first so the manifest is never half-written
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def migrate_json_archive(json_path: Path, archive: JsonlArchive) -> int:
+    """
+    Convert a legacy single-file JSON archive into a JSON Lines archive.
+
+    The legacy file is left untouched.
+
+    Returns:
+        int: Number of records migrated.
+    """
+    if archive.exists():
+        raise RuntimeError(f"Archive already exists: {archive.path}")
+
+    with open(json_path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+
+    return archive.append(data)
@@ -0,0 +1,95 @@
+import math
+import struct
+import hashlib
+
+from pathlib import Path
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set of strings.
+
+    A negative answer is exact ("definitely not added"), a positive answer
+    is wrong with roughly the configured error rate.
+    """
+
+    # File header: magic, number of bits, number of hashes, number of items
+    _header = struct.Struct("<4sQIQ")
+    _magic = b"GBLM"
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(capacity, 1)
+
+        num_bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.num_bits = max(int(math.ceil(num_bits)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.num_items = 0
+
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    @classmethod
+    def from_iterable(cls, items: Iterable[str], capacity: int, error_rate: float = 0.01):
+        bloom = cls(capacity, error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+    @property
+    def expected_error_rate(self) -> float:
+        """False positive rate for the number of items added so far."""
+        fill = 1 - math.exp(-self.num_hashes * self.num_items / self.num_bits)
+        return fill**self.num_hashes
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.num_items += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        for pos in self._positions(item):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def save(self, path: Path) -> None:
+        tmp_path = Path(path).with_suffix(".tmp")
+        with open(tmp_path, "wb") as file:
+            file.write(
+                self._header.pack(self._magic, self.num_bits, self.num_hashes, self.num_items)
+            )
+            file.write(self.bits)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path):
+        with open(path, "rb") as file:
+            header = file.read(cls._header.size)
+            magic, num_bits, num_hashes, num_items = cls._header.unpack(header)
+            if magic != cls._magic:
+                raise RuntimeError(f"Not a bloom filter file: {path}")
+
+            bloom = cls.__new__(cls)
+            bloom.num_bits = num_bits
+            bloom.num_hashes = num_hashes
+            bloom.num_items = num_items
+            bloom.bits = bytearray(file.read())
+
+        return bloom
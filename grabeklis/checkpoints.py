@@ -0,0 +1,92 @@
+import os
+import json
+import hashlib
+
+from pathlib import Path
+from datetime import datetime, timedelta
+
+
+def sitemap_fingerprint(headers, body: bytes) -> str:
+    """
+    Identify a sitemap version by its ETag, Last-Modified or content hash.
+
+    Args:
+        headers (scrapy.http.Headers): Response headers.
+        body (bytes): Uncompressed sitemap body.
+
+    Returns:
+        str: Fingerprint prefixed by its source.
+    """
+    etag = headers.get("ETag")
+    if etag:
+        return "etag:" + etag.decode("latin-1")
+
+    last_modified = headers.get("Last-Modified")
+    if last_modified:
+        return "last-modified:" + last_modified.decode("latin-1")
+
+    return "sha1:" + hashlib.sha1(body).hexdigest()
+
+
+class SitemapCheckpoints:
+    """
+    Per sitemap url fingerprint and completion state, stored as JSON.
+
+    A sitemap is complete when every article url in it was resolved,
+    i.e. scraped, failed or already in history.
+    """
+
+    # Week ends are estimated from the year and week number in the sitemap
+    # url and can be a few days early, depending on how weeks are numbered
+    seal_margin = timedelta(days=7)
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._data = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = {}
+            if self.path.exists():
+                with open(self.path, "r", encoding="utf-8") as file:
+                    self._data = json.load(file)
+        return self._data
+
+    def get(self, url: str) -> dict | None:
+        return self.data.get(url)
+
+    def is_complete(self, url: str, fingerprint: str) -> bool:
+        """Check if sitemap is complete and unchanged since the last run."""
+        checkpoint = self.get(url)
+        if checkpoint is None:
+            return False
+        return checkpoint["complete"] and checkpoint["fingerprint"] == fingerprint
+
+    def is_sealed(self, url: str, week_end: datetime) -> bool:
+        """
+        Check if sitemap was complete after its week was over.
+
+        New articles aren't added to past weeks, so such a sitemap
+        doesn't need to be downloaded again. The week only counts as over
+        seal_margin after its estimated end.
+        """
+        checkpoint = self.get(url)
+        if checkpoint is None or not checkpoint["complete"]:
+            return False
+        return week_end + self.seal_margin < datetime.fromisoformat(checkpoint["checked"])
+
+    def update(self, url: str, fingerprint: str, complete: bool, checked: datetime):
+        self.data[url] = {
+            "fingerprint": fingerprint,
+            "complete": complete,
+            "checked": checked.isoformat(),
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.data, file, indent=4)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,179 @@
+import re
+import traceback
+
+from datetime import datetime
+from typing import Iterable
+
+from lxml import etree
+
+from grabeklis import utils
+from grabeklis.items import LSMArticle
+
+
+IGNORE_ARTICLE_CATEGORIES = (
+    "Apmaksāta informācija*",
+    "Spilgtākie video",
+    "Infografikas",
+    "YouTube apskats",
+    "Animācijas",
+    "Audio",
+    "Komiksi un karikatūras",
+    "Podkāsti",
+    "Raidījumi",
+)
+
+# Url path segments of article sections with only ignored categories
+IGNORE_URL_SEGMENTS = (
+    "/komiksi/",
+    "/raidijumi/",
+)
+
+# Category link in the raw article page, read before the page is parsed
+ARTICLE_CATEGORY_RE = re.compile(
+    rb'<div class="info-item category">\s*<a\b[^>]*>([^<]*)</a>'
+)
+
+
+def is_ignored_url(url: str) -> bool:
+    """Check if article url is in a section with only ignored categories."""
+    return any(segment in url for segment in IGNORE_URL_SEGMENTS)
+
+
+def tidy_string(s: str) -> str:
+    """Common string parsing ops"""
+
+    # Remove newline characters, then collapse any other whitespace runs
+    # (including the non-breaking spaces articles use to keep e.g. "-" off
+    # line ends) into single spaces and drop leading/trailing spaces.
+    # str.split() splits on the same characters as r"\s", in one C pass.
+    s = " ".join(s.replace("\n", "").split())
+
+    if len(s) == 0:
+        raise RuntimeError("No information found.")
+
+    return s
+
+
+def join_paragraphs(paragraphs: Iterable[str]) -> str:
+    """
+    Join paragraphs into a single tidy string.
+
+    Same result as tidy_string over the paragraphs joined by spaces, but
+    each paragraph is normalized as it comes and the result is built once.
+    """
+    words = []
+    for paragraph in paragraphs:
+        words.extend(paragraph.replace("\n", "").split())
+
+    if len(words) == 0:
+        raise RuntimeError("No information found.")
+
+    return " ".join(words)
+
+
+# Article page elements by tag and exact class attribute
+ARTICLE_ELEMENTS = {
+    "category": ("div", "info-item category"),
+    "time": ("div", "info-item time"),
+    "body": ("div", "article__body"),
+    "lead": ("h2", "article-lead"),
+    "title": ("h1", "article-title"),
+}
+_ARTICLE_ELEMENT_KEYS = {element: key for key, element in ARTICLE_ELEMENTS.items()}
+_ARTICLE_ELEMENT_TAGS = tuple(sorted({tag for tag, _ in ARTICLE_ELEMENTS.values()}))
+
+# Selectors relative to the article page elements
+CATEGORY_XPATH = etree.XPath("./a/text()", smart_strings=False)
+TIME_XPATH = etree.XPath("./text()", smart_strings=False)
+# Text from <p> or <blockqoute> elements in article <div>
+BODY_XPATH = etree.XPath("./p/text()|./blockquote/p/text()", smart_strings=False)
+# Sometimes there is a <p> element inside <h2> with the text
+LEAD_XPATH = etree.XPath("./text()|./following-sibling::p/text()", smart_strings=False)
+LEAD_ALL_XPATH = etree.XPath(
+    ".//text()|./following-sibling::p//text()", smart_strings=False
+)
+TITLE_XPATH = etree.XPath("./text()", smart_strings=False)
+
+
+def find_article_elements(root) -> dict[str, list]:
+    """
+    Find all article page elements in a single pass over the document.
+
+    Returns:
+        dict[str, list]: Matching elements in document order by
+            ARTICLE_ELEMENTS key.
+    """
+    found = {key: [] for key in ARTICLE_ELEMENTS}
+    for element in root.iter(*_ARTICLE_ELEMENT_TAGS):
+        key = _ARTICLE_ELEMENT_KEYS.get((element.tag, element.get("class")))
+        if key is not None:
+            found[key].append(element)
+    return found
+
+
+def first_text(xpath, elements: list) -> str | None:
+    """First result of xpath over elements, like SelectorList.get()"""
+    for element in elements:
+        result = xpath(element)
+        if result:
+            return result[0]
+    return None
+
+
+def all_texts(xpath, elements: list) -> list[str]:
+    """All results of xpath over elements, like SelectorList.getall()"""
+    return [text for element in elements for text in xpath(element)]
+
+
+def prepare_item_from_response(response, dt_start: datetime):
+    """Extract and parse any relevant information from an article."""
+
+    try:
+        elements = find_article_elements(response.selector.root)
+
+        # First check article category.
+        # Some contain mostly audio, video or pictures. Those are excluded.
+        # Paid articles are also excluded.
+        category = first_text(CATEGORY_XPATH, elements["category"])
+        category = tidy_string(category)
+
+        if category in IGNORE_ARTICLE_CATEGORIES:
+            raise ValueError(f"Article category '{category}' in ignore list")
+
+        publish_date = first_text(TIME_XPATH, elements["time"])
+        publish_date = tidy_string(publish_date)
+
+        # This year's dates don't have year, yesterday's date say yesterday etc.
+        publish_date = utils.parse_datetime(publish_date, dt_start)
+        publish_date = publish_date.strftime("%Y-%m-%d %H:%M")
+
+        # Convert from list of strings to a single string,
+        # with whitespace after end of sentence
+        article = join_paragraphs(all_texts(BODY_XPATH, elements["body"]))
+
+        lead = first_text(LEAD_XPATH, elements["lead"])
+        if lead is None or len(lead) < 2:  # can be ' '
+            lead_parts = all_texts(LEAD_ALL_XPATH, elements["lead"])
+            lead = " ".join(lead_parts).replace("  ", " ").strip()
+
+        lead = tidy_string(lead)
+
+        title = first_text(TITLE_XPATH, elements["title"])
+        title = tidy_string(title)
+
+        url = response.url
+
+        item = LSMArticle(
+            url=url,
+            datums=publish_date,
+            kategorija=category,
+            virsraksts=title,
+            kopsavilkums=lead,
+            raksts=article,
+        )
+
+    except Exception:
+        err = traceback.format_exc()
+        return LSMArticle(url=response.url, error=err)
+
+    return item
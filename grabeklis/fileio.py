@@ -0,0 +1,163 @@
+import io
+import gzip
+import json
+
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compression setting value -> file name suffix
+COMPRESSION_SUFFIXES = {
+    None: "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+# Data file suffixes, JSON list files are from before JSON Lines
+DATA_SUFFIXES = (".json", ".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+
+def compression_suffix(compression: str | None) -> str:
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported compression: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression requires the 'zstandard' package")
+    return COMPRESSION_SUFFIXES[compression]
+
+
+def compression_from_name(path: Path) -> str | None:
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and str(path).endswith(suffix):
+            return compression
+    return None
+
+
+def open_text(path: Path, mode: str = "r", compression: str | None = "infer"):
+    """
+    Open a text file, compressed or not.
+
+    Args:
+        path (Path): File path.
+        mode (str): "r", "w" or "a".
+        compression (str | None): Compression, inferred from the file
+            name suffix by default.
+    """
+    if compression == "infer":
+        compression = compression_from_name(path)
+
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if compression == "zstd":
+        compression_suffix(compression)
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def compress_stream(file: BinaryIO, compression: str | None) -> BinaryIO:
+    """
+    Wrap a binary file for writing compressed data.
+
+    Closing the returned stream finishes the compressed member or frame
+    but leaves the underlying file open. Compressed members can be
+    appended to each other and are read back as one stream.
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=file, mode="wb")
+    if compression == "zstd":
+        compression_suffix(compression)
+        return zstandard.ZstdCompressor().stream_writer(file, closefd=False)
+    return _Unclosed(file)
+
+
+def decompress_stream(file: BinaryIO, compression: str | None) -> BinaryIO:
+    """Wrap a binary file for reading lines of compressed data."""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=file, mode="rb")
+    if compression == "zstd":
+        compression_suffix(compression)
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            file, read_across_frames=True, closefd=False
+        )
+        return io.BufferedReader(reader)
+    return file
+
+
+def compress_bytes(data: bytes, compression: str | None) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        compression_suffix(compression)
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def decompress_bytes(data: bytes, compression: str | None) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        compression_suffix(compression)
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+class _Unclosed(io.RawIOBase):
+    """Writes through to a file without closing it."""
+
+    def __init__(self, file: BinaryIO) -> None:
+        self.file = file
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        return self.file.write(data)
+
+
+class LimitedReader(io.RawIOBase):
+    """Reads at most limit bytes from a binary file."""
+
+    def __init__(self, file: BinaryIO, limit: int) -> None:
+        self.file = file
+        self.remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+
+        data = self.file.read(size)
+        buffer[: len(data)] = data
+        self.remaining -= len(data)
+
+        return len(data)
+
+
+def iter_records(path: Path) -> Iterator[dict]:
+    """Read records from a JSON list or JSON Lines file, compressed or not."""
+    path = Path(path)
+
+    if path.name.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as file:
+            yield from json.load(file)
+        return
+
+    with open_text(path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def find_data_files(directory: Path, prefix: str) -> list[Path]:
+    """Find data files of a run directory starting with prefix."""
+    return sorted(
+        path
+        for path in Path(directory).glob(f"{prefix}*")
+        if path.name.endswith(DATA_SUFFIXES)
+    )
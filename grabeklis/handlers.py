@@ -1,13 +1,46 @@
 import os
 import json
-import glob
+import shutil
+import hashlib
+import argparse
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
 
 from pathlib import Path
 
 try:
     from grabeklis import settings
+    from grabeklis.archive import JsonlArchive, migrate_json_archive
+    from grabeklis.history import UrlHistory
+    from grabeklis.bloom import BloomFilter
+    from grabeklis.fileio import find_data_files, iter_records
+    from grabeklis.rawstore import RawPageStore
+    from grabeklis.validation import (
+        BatchFileResult,
+        find_batch_files,
+        format_problems,
+        validate_batch_files,
+    )
 except ModuleNotFoundError:
     import settings
+    from archive import JsonlArchive, migrate_json_archive
+    from history import UrlHistory
+    from bloom import BloomFilter
+    from fileio import find_data_files, iter_records
+    from rawstore import RawPageStore
+    from validation import (
+        BatchFileResult,
+        find_batch_files,
+        format_problems,
+        validate_batch_files,
+    )
+
+
+def failed_item_key(item: dict) -> str:
+    """Archive index key of a failed item: url and a hash of its error."""
+    error_hash = hashlib.sha1(item.get("error", "").encode("utf-8")).hexdigest()
+    return f"{item['url']} {error_hash}"
 
 
 class ScrapedDataHandler:
@@ -26,155 +59,259 @@ class ScrapedDataHandler:
 
         self.spider_data_dir = self.data_dir / self.spider_name
 
-        # File name where run-specific failed scrapes are stored
-        self.fail_run_name = "run_failed_items.json"
-        # File where all failed scrapes are stored
-        self.fail_archive_name = "archive_failed.json"
-        # File where just the urls of all failed scrapes are stored
-        self.fail_history_name = "_history_failed.json"
-
-        # Same naming strategy, except run name is now a pattern,
-        # because there can be multiple files in a single run
+        # File name prefix where run-specific failed scrapes are stored
+        self.fail_run_prefix = "run_failed_items"
+        # Directory where all failed scrapes are stored
+        self.fail_archive_name = "archive_failed"
+        # Single-file archive used before the JSON Lines archive
+        self.fail_legacy_archive_name = "archive_failed.json"
+        # Database where just the urls of all failed scrapes are stored
+        self.fail_history_name = "_history_failed.sqlite3"
+        self.fail_legacy_history_name = "_history_failed.json"
+
+        # Same naming strategy, there can be multiple files in a single run
         self.batch_prefix = "batch_articles"
-        self.ok_run_name_pattern = "batch_articles_*.json"
-        self.ok_archive_name = "archive_ok.json"
-        self.ok_history_name = "_history_ok.json"
+        self.ok_archive_name = "archive_ok"
+        self.ok_legacy_archive_name = "archive_ok.json"
+        self.ok_history_name = "_history_ok.sqlite3"
+        self.ok_legacy_history_name = "_history_ok.json"
+        # Bloom filter of the ok url history
+        self.ok_bloom_name = "_history_ok.bloom"
+        self.ok_bloom_path = self.spider_data_dir / self.ok_bloom_name
+
+        # Fingerprint and completion state of weekly sitemaps
+        self.sitemap_checkpoints_name = "_sitemap_checkpoints.json"
+
+        # Downloaded article pages, for extracting articles again offline
+        self.raw_store_name = "raw_pages"
 
         # File name with summary info of the final dataset
         self.summary_name = "summary.json"
         self.summary_path = self.spider_data_dir / self.summary_name
 
-    def run_batch_tests(self, run_dir: str | None = None):
-        if run_dir:
-            cmd = f"pytest --spider={self.spider_name} --dir={run_dir}"
-        else:
-            cmd = f"pytest --spider={self.spider_name}"
-
-        return os.system(cmd)
+        archive_compression = getattr(settings, "ARCHIVE_COMPRESSION", None)
+        self.ok_archive = JsonlArchive(
+            self.spider_data_dir / self.ok_archive_name, compression=archive_compression
+        )
+        self.fail_archive = JsonlArchive(
+            self.spider_data_dir / self.fail_archive_name,
+            key_func=failed_item_key,
+            compression=archive_compression,
+        )
+
+        self.raw_store = RawPageStore(
+            self.spider_data_dir / self.raw_store_name,
+            compression=getattr(settings, "RAW_STORE_COMPRESSION", "gzip"),
+        )
+
+        self.ok_history = UrlHistory(
+            self.spider_data_dir / self.ok_history_name,
+            legacy_path=self.spider_data_dir / self.ok_legacy_history_name,
+        )
+        self.fail_history = UrlHistory(
+            self.spider_data_dir / self.fail_history_name,
+            legacy_path=self.spider_data_dir / self.fail_legacy_history_name,
+        )
+
+    def validate_batches(self, run_dir: str | None = None) -> list[BatchFileResult]:
+        """Validate the batch files of a run, or of all runs of the spider."""
+        ok_paths, failed_paths = find_batch_files(
+            self.data_dir,
+            self.spider_name,
+            run_dir,
+            batch_prefix=self.batch_prefix,
+            fail_run_prefix=self.fail_run_prefix,
+        )
+        workers = getattr(settings, "VALIDATION_WORKERS", None)
+
+        return validate_batch_files(ok_paths, failed_paths, workers=workers)
 
     def archive_failed_run_items(self, run_name: str):
-        run_failed_name = self.spider_data_dir / run_name / self.fail_run_name
+        run_dir = self.spider_data_dir / run_name
+        files = find_data_files(run_dir, self.fail_run_prefix)
 
-        if not run_failed_name.exists():
+        if len(files) == 0:
             # No file means nothing failed to scrape
             return (0, 0)
 
-        combined_data = []
-
-        # Load the existing archive if it already exists
-        fail_archive_data = []
-        fail_archive = self.spider_data_dir / self.fail_archive_name
-        if fail_archive.exists():
-            with open(fail_archive, "r", encoding="utf-8") as file:
-                fail_archive_data = json.load(file)
-
-        combined_data += fail_archive_data
-
         fail_run_data = []
-        with open(run_failed_name, "r", encoding="utf-8") as file:
-            fail_run_data = json.load(file)
+        for fpath in files:
+            fail_run_data.extend(iter_records(fpath))
 
-        for failed_item in fail_run_data:
-            if failed_item not in combined_data:
-                combined_data.append(failed_item)
+        # Look up keys in the archive index instead of comparing items
+        archived_keys = self.fail_archive.keys
+        run_keys = set()
 
-        size_existing = len(fail_archive_data)
-        size_all = len(fail_run_data) + size_existing
-        size_new_unique = len(combined_data)
+        new_items = []
+        for failed_item in fail_run_data:
+            key = failed_item_key(failed_item)
+            if key not in archived_keys and key not in run_keys:
+                run_keys.add(key)
+                new_items.append(failed_item)
 
-        num_new = size_all - size_existing
-        num_dupes = size_all - size_new_unique
-        num_new_added = num_new - num_dupes
+        num_new_added = len(new_items)
+        num_dupes = len(fail_run_data) - num_new_added
 
-        # Save combined file
-        with open(fail_archive, "w") as fail_archive_file:
-            json.dump(combined_data, fail_archive_file, indent=4)
+        # Append only the new items
+        self.fail_archive.append(new_items, run_name)
+        self.fail_history.update(item["url"] for item in new_items)
 
         return (num_new_added, num_dupes)
 
-    def archive_ok_run_items(self, run_name: str):
-        run_dir = self.spider_data_dir / run_name
-        path_pattern = run_dir / self.ok_run_name_pattern
+    def archive_ok_run_items(self, run_name: str, seen_urls: set | None = None):
+        """
+        Append a run's scraped articles to the ok archive.
 
-        # Use glob to find all JSON files in a directory
-        files = glob.glob(path_pattern.as_posix())
+        Args:
+            run_name (str): Run directory name.
+            seen_urls (set | None): Urls archived by related runs, e.g. other
+                shards of the same crawl. Their articles count as duplicates,
+                and this run's urls are added.
+
+        Returns:
+            tuple[int, int]: Number of new and duplicate articles.
+        """
+        run_dir = self.spider_data_dir / run_name
+        files = find_data_files(run_dir, self.batch_prefix)
 
         if len(files) == 0:
             # No articles scraped
             # Can happen if all scrapes failed
             return (0, 0)
 
-        # Initialize an empty list to store the combined data
-        combined_data = []
-
-        # Load the existing archive if it already exists
-        archive = self.spider_data_dir / self.ok_archive_name
-        archive_data = []
-        if archive.exists():
-            with open(archive, "r", encoding="utf-8") as file:
-                archive_data = json.load(file)
-
-        combined_data += archive_data
-
-        # Read and merge JSON files
+        if self.ok_archive.has_run(run_name):
+            # Duplicates should only exist if this function called twice in a row
+            num_records = 0
+            for fpath in files:
+                for item in iter_records(fpath):
+                    num_records += 1
+                    if seen_urls is not None:
+                        # Later runs still see this run's articles as archived
+                        seen_urls.add(item["url"])
+            return (0, num_records)
+
+        # Read batch files of this run only
+        run_data = []
         for fpath in files:
             print(f"Merging content from: {fpath}")
-            with open(fpath, "r") as file:
-                data = json.load(file)
-                combined_data.extend(data)
+            run_data.extend(iter_records(fpath))
 
-        size_existing = len(archive_data)
-        size_new = len(combined_data)
+        # Remove duplicates within the run, keeping the first occurrence
+        seen = set()
+        new_items = []
+        for item in run_data:
+            key = tuple(item.items())
+            if key in seen:
+                continue
+            seen.add(key)
 
-        num_new = size_new - size_existing
+            if seen_urls is not None:
+                if item["url"] in seen_urls:
+                    continue
+                seen_urls.add(item["url"])
 
-        # Remove duplicates
-        # Duplicates should only exist if this function called twice in a row
-        combined_data = [dict(t) for t in {tuple(d.items()) for d in combined_data}]
+            new_items.append(item)
 
-        size_no_duplicates = len(combined_data)
-        num_dupes = size_new - size_no_duplicates
-        num_new_added = num_new - num_dupes
+        num_new_added = len(new_items)
+        num_dupes = len(run_data) - num_new_added
 
-        # Serialize combined data to a new JSON file
-        with open(archive, "w") as archive_file:
-            json.dump(combined_data, archive_file, ensure_ascii=False, indent=4)
+        # Append to archive instead of rewriting it
+        self.ok_archive.append(new_items, run_name)
+        self.ok_history.update(item["url"] for item in new_items)
 
         return (num_new_added, num_dupes)
 
-    def make_history_file(self, archive: str):
+    def merge_shard_runs(self, run_names: list[str]) -> dict:
+        """
+        Archive the runs of a sharded crawl, once all of them are valid.
+
+        Runs are archived in the given order. An article scraped by several
+        shards is archived once, from the first of them, and a failure
+        once per url and error, so the result doesn't depend on which shard
+        finished first.
+
+        Returns:
+            dict: Number of new and duplicate articles, like
+                add_scraped_data_to_archives.
+        """
+        if self.mode != "test":
+            raise RuntimeError("Function call only allowed in test mode")
+
+        results = []
+        for run_name in run_names:
+            results.extend(self.validate_batches(run_name))
+
+        if not all(result.ok for result in results):
+            raise RuntimeError(f"Invalid batch files:\n{format_problems(results)}")
+
+        info = {
+            "new_in_ok_archive": 0,
+            "skipped_ok_duplicates": 0,
+            "new_in_failed_archive": 0,
+            "skipped_fail_duplicates": 0,
+        }
+
+        seen_urls = set()
+        for run_name in run_names:
+            new_ok, dupe_ok = self.archive_ok_run_items(run_name, seen_urls)
+            new_fail, dupe_fail = self.archive_failed_run_items(run_name)
+
+            info["new_in_ok_archive"] += new_ok
+            info["skipped_ok_duplicates"] += dupe_ok
+            info["new_in_failed_archive"] += new_fail
+            info["skipped_fail_duplicates"] += dupe_fail
+
+        return info
+
+    def make_history_file(self, archive: str, rebuild: bool = False):
+        """
+        Make sure the url history matches the archive.
+
+        Histories are updated incrementally while archiving runs, so they
+        are only regenerated from the archive when empty or on request.
+        """
         if archive == "ok":
-            archive_path = self.spider_data_dir / self.ok_archive_name
-            history_path = self.spider_data_dir / self.ok_history_name
+            jsonl_archive = self.ok_archive
+            history = self.ok_history
         elif archive == "failed":
-            archive_path = self.spider_data_dir / self.fail_archive_name
-            history_path = self.spider_data_dir / self.fail_history_name
+            jsonl_archive = self.fail_archive
+            history = self.fail_history
         else:
             raise RuntimeError("Invalid value for argument 'archive'")
 
-        if not archive_path.exists():
+        if not jsonl_archive.exists():
             return
 
-        with open(archive_path, "r") as file:
-            data = json.load(file)
+        if rebuild or (history.is_empty() and len(jsonl_archive) > 0):
+            history.replace(value["url"] for value in jsonl_archive.iter_records())
 
-        urls = []
-        for value in data:
-            url = value["url"]
-            urls.append(url)
+        return len(jsonl_archive)
 
-        with open(history_path, "w") as file:
-            json.dump(urls, file, indent=4)
+    def make_history_bloom(self):
+        """Rebuild the bloom filter of the ok url history."""
+        if not getattr(settings, "HISTORY_BLOOM_ENABLED", False):
+            return
 
-        return len(urls)
+        if not self.ok_archive.exists():
+            return
+
+        # Leave room for urls added by the next runs
+        num_urls = len(self.ok_history)
+        capacity = max(2 * num_urls, 100_000)
+        error_rate = getattr(settings, "HISTORY_BLOOM_ERROR_RATE", 0.01)
+
+        bloom = BloomFilter.from_iterable(self.ok_history, capacity, error_rate)
+        bloom.save(self.ok_bloom_path)
+
+        return bloom
 
     def add_scraped_data_to_archives(self, run_name: str) -> dict:
         if self.mode != "test":
             raise RuntimeError("Function call only allowed in test mode")
 
-        exit_code = self.run_batch_tests(run_name)
-        if exit_code != 0:
-            raise RuntimeError(f"Pytest exit code: {exit_code}")
+        results = self.validate_batches(run_name)
+        if not all(result.ok for result in results):
+            raise RuntimeError(f"Invalid batch files:\n{format_problems(results)}")
 
         info = {
             "new_in_ok_archive": 0,
@@ -203,6 +340,8 @@ class ScrapedDataHandler:
         # Update failed to scrape article url history
         num_fail = self.make_history_file("failed")
 
+        self.make_history_bloom()
+
         summary = {
             "num_articles_ok": num_ok,
             "num_articles_failed": num_fail,
@@ -211,14 +350,180 @@ class ScrapedDataHandler:
         with open(self.summary_path, "w", encoding="utf-8") as file:
             json.dump(summary, file, indent=4)
 
+    def find_run_names(self) -> list[str]:
+        """Run directories, named by their start time."""
+        return sorted(
+            obj.name
+            for obj in self.spider_data_dir.glob("*")
+            if obj.is_dir() and obj.name.isdigit()
+        )
+
     def create_archives_from_scraped_data(self):
-        for obj in self.spider_data_dir.glob("*"):
-            if obj.is_dir():
-                print(f"Archiving {obj.name}")
-                info = self.add_scraped_data_to_archives(obj.name)
-                print(info)
+        for run_name in self.find_run_names():
+            print(f"Archiving {run_name}")
+            info = self.add_scraped_data_to_archives(run_name)
+            print(info)
+
+    def reextract_archives(self, workers: int | None = None) -> dict:
+        """
+        Rebuild the archives by extracting articles again from the raw page
+        store, in parallel and without network access.
+
+        Archived articles without a stored page are kept as they are.
+        Articles of stored pages are replaced by the new extraction, in the
+        ok or failed archive depending on the outcome.
+
+        Args:
+            workers (int | None): Worker processes, all CPUs by default.
+
+        Returns:
+            dict: Number of re-extracted and kept articles.
+        """
+        # Extraction is spider specific and needs Scrapy, import on demand
+        from grabeklis.parsing import extract_stored_page
+
+        if not self.raw_store.exists():
+            raise RuntimeError(f"No raw pages stored in {self.raw_store.path}")
+
+        stored_urls = {page.url for page in self.raw_store}
+
+        new_ok = self._rebuild_target(self.ok_archive)
+        new_fail = self._rebuild_target(self.fail_archive)
+
+        kept_ok = (
+            item for item in self.ok_archive.iter_records() if item["url"] not in stored_urls
+        )
+        kept_failed = (
+            item for item in self.fail_archive.iter_records() if item["url"] not in stored_urls
+        )
+
+        info = {}
+        info["kept_ok"] = new_ok.append(kept_ok)
+        info["kept_failed"] = new_fail.append(self._new_failed_items(new_fail, kept_failed))
+        info["reextracted_ok"] = 0
+        info["reextracted_failed"] = 0
+
+        store_path = str(self.raw_store.path)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            items = executor.map(
+                extract_stored_page, repeat(store_path), self.raw_store, chunksize=64
+            )
+
+            # Appended in chunks, so extracted articles aren't all kept in memory
+            while chunk := list(islice(items, 1000)):
+                ok_items = [item for item in chunk if item.get("error") is None]
+                failed_items = [item for item in chunk if item.get("error") is not None]
+
+                info["reextracted_ok"] += new_ok.append(ok_items)
+                info["reextracted_failed"] += new_fail.append(
+                    self._new_failed_items(new_fail, failed_items)
+                )
+
+        # Runs stay merged, so they can't be added again
+        new_ok.add_runs(self.ok_archive.manifest["runs"])
+        new_fail.add_runs(self.fail_archive.manifest["runs"])
+
+        self.ok_archive = self._replace_archive(self.ok_archive, new_ok)
+        self.fail_archive = self._replace_archive(self.fail_archive, new_fail)
+
+        self.make_history_file("ok", rebuild=True)
+        self.make_history_file("failed", rebuild=True)
+
+        return info
+
+    def _rebuild_target(self, archive: JsonlArchive) -> JsonlArchive:
+        path = archive.path.with_name(archive.path.name + ".rebuild")
+
+        # Left over from an interrupted rebuild
+        if path.exists():
+            shutil.rmtree(path)
+
+        return JsonlArchive(path, key_func=archive.key_func, compression=archive.compression)
+
+    def _new_failed_items(self, archive: JsonlArchive, items):
+        # Same failure of the same url is archived once
+        seen = set()
+        for item in items:
+            key = failed_item_key(item)
+            if key not in archive.keys and key not in seen:
+                seen.add(key)
+                yield item
+
+    def _replace_archive(self, archive: JsonlArchive, new: JsonlArchive) -> JsonlArchive:
+        # Key index databases are moved along with their directories
+        archive.close()
+        new.close()
+
+        backup = archive.path.with_name(archive.path.name + ".old")
+        if backup.exists():
+            shutil.rmtree(backup)
+
+        if archive.path.exists():
+            os.replace(archive.path, backup)
+        os.replace(new.path, archive.path)
+
+        shutil.rmtree(backup, ignore_errors=True)
+
+        return JsonlArchive(
+            archive.path, key_func=archive.key_func, compression=archive.compression
+        )
+
+    def migrate_legacy_archives(self) -> dict:
+        """
+        Convert single-file JSON archives to JSON Lines archives.
+
+        Legacy archives were built from every run directory, so existing
+        runs are recorded as merged and aren't archived again.
+        """
+        info = {}
+        run_names = self.find_run_names()
+
+        legacy = (
+            ("ok", self.ok_legacy_archive_name, self.ok_archive),
+            ("failed", self.fail_legacy_archive_name, self.fail_archive),
+        )
+
+        for archive, legacy_name, jsonl_archive in legacy:
+            legacy_path = self.spider_data_dir / legacy_name
+            if not legacy_path.exists():
+                continue
+
+            print(f"Migrating {legacy_path} to {jsonl_archive.path}")
+            info[f"migrated_{archive}"] = migrate_json_archive(legacy_path, jsonl_archive)
+            jsonl_archive.add_runs(run_names)
+
+        return info
 
 
 if __name__ == "__main__":
-    handler = ScrapedDataHandler("lsmsitemap")
+    parser = argparse.ArgumentParser(description="Manage scraped data archives")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="summaries",
+        choices=("summaries", "migrate", "history", "reextract", "validate"),
+    )
+    parser.add_argument("--spider", default="lsmsitemap")
+    parser.add_argument("--mode", default="test", choices=("test", "production"))
+    parser.add_argument("--dir", help="Single run directory to validate")
+    parser.add_argument("--workers", type=int, help="Worker processes for reextract")
+    args = parser.parse_args()
+
+    handler = ScrapedDataHandler(args.spider, mode=args.mode)
+
+    if args.command == "migrate":
+        print(handler.migrate_legacy_archives())
+    elif args.command == "history":
+        # Regenerate url histories from the archives
+        handler.make_history_file("ok", rebuild=True)
+        handler.make_history_file("failed", rebuild=True)
+    elif args.command == "reextract":
+        # Extract articles again from stored pages and rebuild the archives
+        print(handler.reextract_archives(args.workers))
+    elif args.command == "validate":
+        # Check batch files without archiving them
+        results = handler.validate_batches(args.dir)
+        invalid = format_problems(results)
+        print(invalid or f"All {len(results)} batch files valid")
+
     handler.make_archive_summaries()
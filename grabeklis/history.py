@@ -0,0 +1,95 @@
+import json
+import sqlite3
+
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+class UrlHistory:
+    """
+    Disk-backed set of urls, stored in SQLite.
+
+    Lookups go through the primary key index, so opening the history and
+    checking a url costs the same no matter how many urls it holds.
+    """
+
+    # Number of added urls kept in an open transaction before committing
+    commit_every = 100
+
+    def __init__(self, path: Path, legacy_path: Path | None = None) -> None:
+        """
+        Args:
+            path (Path): SQLite database file.
+            legacy_path (Path | None): JSON list of urls imported when the
+                database is created.
+        """
+        self.path = Path(path)
+        self.legacy_path = legacy_path
+
+        self._conn = None
+        self._num_pending = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            is_new = not self.path.exists()
+
+            # Archiving runs in a worker thread once crawling is done
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY) WITHOUT ROWID"
+            )
+
+            if is_new and self.legacy_path is not None and self.legacy_path.exists():
+                with open(self.legacy_path, "r", encoding="utf-8") as file:
+                    self.update(json.load(file))
+
+            self._conn.commit()
+
+        return self._conn
+
+    def __contains__(self, url: str) -> bool:
+        cursor = self.conn.execute("SELECT 1 FROM urls WHERE url = ?", (url,))
+        return cursor.fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        for (url,) in self.conn.execute("SELECT url FROM urls"):
+            yield url
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM urls LIMIT 1").fetchone() is None
+
+    def add(self, url: str) -> None:
+        self.conn.execute("INSERT OR IGNORE INTO urls (url) VALUES (?)", (url,))
+
+        self._num_pending += 1
+        if self._num_pending >= self.commit_every:
+            self.commit()
+
+    def update(self, urls: Iterable[str]) -> None:
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO urls (url) VALUES (?)", ((url,) for url in urls)
+        )
+        self.commit()
+
+    def replace(self, urls: Iterable[str]) -> None:
+        """Replace all stored urls."""
+        self.conn.execute("DELETE FROM urls")
+        self.update(urls)
+
+    def commit(self) -> None:
+        if self._conn is not None:
+            self._conn.commit()
+        self._num_pending = 0
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.commit()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,70 @@
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.extensions.httpcache import RFC2616Policy
+
+from grabeklis.sitemap import is_sitemap_url
+
+
+class SitemapCachePolicy(RFC2616Policy):
+    """
+    HTTP cache policy that only caches sitemaps and always revalidates them.
+
+    Sitemaps change without notice, so a cached sitemap is never used as is.
+    It is requested again with If-None-Match/If-Modified-Since, and reused
+    only when the server answers 304 Not Modified.
+    """
+
+    def should_cache_request(self, request) -> bool:
+        return is_sitemap_url(request.url) and super().should_cache_request(request)
+
+    def is_cached_response_fresh(self, cachedresponse, request) -> bool:
+        etag = cachedresponse.headers.get(b"ETag")
+        if etag:
+            request.headers[b"If-None-Match"] = etag
+
+        last_modified = cachedresponse.headers.get(b"Last-Modified")
+        if last_modified:
+            request.headers[b"If-Modified-Since"] = last_modified
+
+        return False
+
+
+class SitemapHttpCacheMiddleware(HttpCacheMiddleware):
+    """
+    HttpCacheMiddleware that also reports what revalidation saves.
+
+    Stats:
+        httpcache/not_modified: Cached sitemaps reused after a 304.
+        httpcache/bytes_saved: Body bytes not downloaded thanks to a 304.
+        httpcache/revalidation_latency_avg, _max: Seconds per revalidation.
+    """
+
+    def process_response(self, request, response, spider):
+        cachedresponse = request.meta.get("cached_response")
+
+        result = super().process_response(request, response, spider)
+        if cachedresponse is None:
+            return result
+
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            self.stats.inc_value("httpcache/revalidation_count", spider=spider)
+            self.stats.inc_value("httpcache/revalidation_latency_total", latency, spider=spider)
+            self.stats.max_value("httpcache/revalidation_latency_max", latency, spider=spider)
+
+        if result is cachedresponse and response.status == 304:
+            self.stats.inc_value("httpcache/not_modified", spider=spider)
+            self.stats.inc_value(
+                "httpcache/bytes_saved",
+                len(cachedresponse.body) - len(response.body),
+                spider=spider,
+            )
+
+        return result
+
+    def spider_closed(self, spider):
+        super().spider_closed(spider)
+
+        count = self.stats.get_value("httpcache/revalidation_count", spider=spider)
+        if count:
+            total = self.stats.get_value("httpcache/revalidation_latency_total", spider=spider)
+            self.stats.set_value("httpcache/revalidation_latency_avg", total / count, spider=spider)
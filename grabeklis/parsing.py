@@ -0,0 +1,77 @@
+import asyncio
+import multiprocessing
+
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapy.http import HtmlResponse
+
+from grabeklis.extract import prepare_item_from_response
+from grabeklis.items import LSMArticle
+from grabeklis.rawstore import RawPageStore, StoredPage
+
+
+def extract_item(url: str, body: bytes, encoding: str, dt_start: datetime) -> dict:
+    """prepare_item_from_response for a raw response body. Runs in a worker."""
+    response = HtmlResponse(url, body=body, encoding=encoding)
+    return dict(prepare_item_from_response(response, dt_start))
+
+
+def extract_stored_page(store_path: str, page: StoredPage) -> dict:
+    """extract_item for a page in a raw page store. Runs in a worker."""
+    body = RawPageStore(store_path).read(page.digest)
+    return extract_item(page.url, body, page.encoding, page.fetched)
+
+
+class ProcessParser:
+    """
+    Extracts articles in a pool of worker processes, so HTML parsing
+    isn't limited to the single core the reactor runs on.
+
+    Workers get the decoded response body, url and encoding, and run the
+    same extraction as the crawler process would, so items are identical.
+
+    At most ``max_pending`` responses are in the pool at a time. Further
+    callers wait, which holds their responses in Scrapy's scraper and in
+    turn slows down downloading.
+    """
+
+    def __init__(self, workers: int, max_pending: int, stats=None) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.stats = stats
+
+        # Spawned rather than forked, the crawler process runs threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._semaphore = asyncio.Semaphore(max_pending)
+
+    async def extract(self, response, dt_start: datetime) -> LSMArticle:
+        """
+        Extract an article from a response in a worker process.
+
+        Args:
+            response (scrapy.http.TextResponse): Article page response.
+            dt_start (datetime): Download start, see prepare_item_from_response.
+
+        Returns:
+            LSMArticle: Scraped or failed article item.
+        """
+        if self.stats is not None and self._semaphore.locked():
+            # Workers are falling behind
+            self.stats.inc_value("parsing/backpressure_waits")
+
+        async with self._semaphore:
+            future = self.executor.submit(
+                extract_item, response.url, response.body, response.encoding, dt_start
+            )
+            fields = await asyncio.wrap_future(future)
+
+        if self.stats is not None:
+            self.stats.inc_value("parsing/process_items")
+
+        return LSMArticle(**fields)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -3,11 +3,200 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import os
+import json
+
+from datetime import datetime
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from twisted.internet import reactor
+
+from grabeklis.fileio import compression_suffix, open_text
+from grabeklis.writer import BackgroundWriter
+
+
+class RotatingJsonlWriter:
+    """
+    Writes records to JSON Lines files, starting a new file when the
+    current one reaches a size or record limit.
+
+    Files are written under a temporary name and renamed once closed
+    and synced to disk, so only complete files carry the final name.
+
+    Not thread-safe, all calls should come from the same thread.
+    """
+
+    def __init__(
+        self,
+        directory,
+        prefix: str,
+        max_bytes: int = 0,
+        max_items: int = 0,
+        compression: str | None = None,
+        on_close=None,
+    ) -> None:
+        """
+        Args:
+            directory (Path): Output directory, created on first write.
+            prefix (str): File name prefix.
+            max_bytes (int): Uncompressed size limit per file, 0 for none.
+            max_items (int): Record limit per file, 0 for none.
+            compression (str | None): File compression, see fileio.
+            on_close (Callable[[Path, list[str]], None]): Called with the
+                final path and urls of every closed file.
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.compression = compression
+        self.suffix = ".jsonl" + compression_suffix(compression)
+        self.on_close = on_close
+
+        self.num_files = 0
+
+        self._file = None
+        self._path = None
+        self._urls = []
+        self._bytes = 0
+
+    def write(self, record: dict) -> None:
+        if self._file is None:
+            self._open()
+
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._file.write(line)
+
+        self._urls.append(record.get("url"))
+        self._bytes += len(line.encode("utf-8"))
+
+        if self._is_full():
+            self.close()
+
+    def _is_full(self) -> bool:
+        if self.max_bytes > 0 and self._bytes >= self.max_bytes:
+            return True
+        if self.max_items > 0 and len(self._urls) >= self.max_items:
+            return True
+        return False
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Counter keeps files opened within the same second apart
+        time_str = datetime.now().strftime("%Y%m%d%H%M%S")
+        file_name = f"{self.prefix}_{time_str}_{self.num_files:04d}{self.suffix}"
+
+        self._path = self.directory / file_name
+        tmp_path = self._path.with_name(file_name + ".tmp")
+        self._file = open_text(tmp_path, "w", compression=self.compression)
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+
+        self._file.close()
+
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with open(tmp_path, "rb") as file:
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self._path)
+
+        if self.on_close is not None:
+            self.on_close(self._path, self._urls)
+
+        self.num_files += 1
+
+        self._file = None
+        self._urls = []
+        self._bytes = 0
 
 
 class GrabeklisPipeline:
+    """
+    Streams scraped items to rotating JSON Lines batch files in the
+    spider's run directory, so the spider doesn't hold items in memory.
+
+    Serialization and file I/O run on a background writer thread. An item
+    is done once it is written, so a slow disk slows down item processing
+    instead of the reactor.
+
+    Only active for spiders that save results (``save_scraped``).
+    """
+
+    def __init__(self, settings, stats) -> None:
+        self.settings = settings
+        self.stats = stats
+
+        self.ok_writer = None
+        self.failed_writer = None
+        self.background = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler.stats)
+
+    def open_spider(self, spider):
+        if not getattr(spider, "save_scraped", False):
+            return
+
+        compression = self.settings.get("BATCH_FILE_COMPRESSION")
+
+        self.ok_writer = RotatingJsonlWriter(
+            spider.spider_run_dir,
+            spider.batch_prefix,
+            max_bytes=self.settings.getint("BATCH_FILE_MAX_BYTES"),
+            max_items=self.settings.getint("BATCH_FILE_MAX_ITEMS"),
+            compression=compression,
+            # Writers run on the writer thread, spider hooks on the reactor
+            on_close=lambda path, urls: reactor.callFromThread(
+                self._batch_saved, spider, urls
+            ),
+        )
+
+        # All failed items of a run end up in a single file
+        self.failed_writer = RotatingJsonlWriter(
+            spider.spider_run_dir,
+            spider.run_fail_prefix,
+            compression=compression,
+        )
+
+        self.background = BackgroundWriter(
+            max_pending=self.settings.getint("WRITER_MAX_PENDING"), stats=self.stats
+        )
+
+    def _batch_saved(self, spider, urls):
+        self.stats.inc_value("batches/files_written")
+
+        batch_saved = getattr(spider, "batch_saved", None)
+        if batch_saved is not None:
+            batch_saved(urls)
+
     def process_item(self, item, spider):
-        return item
+        if self.ok_writer is None:
+            return item
+
+        adapter = ItemAdapter(item)
+        if adapter.get("error") is not None:
+            writer = self.failed_writer
+            self.stats.inc_value("batches/items_failed")
+        else:
+            writer = self.ok_writer
+            self.stats.inc_value("batches/items_ok")
+
+        d = self.background.submit(writer.write, adapter.asdict())
+        d.addCallback(lambda _: item)
+        return d
+
+    def close_spider(self, spider):
+        if self.ok_writer is None:
+            return
+
+        # Queued after all items, so every item is written before closing
+        self.background.submit(self.ok_writer.close)
+        self.background.submit(self.failed_writer.close)
+
+        # Thread calls reach the reactor in order, so batch_saved hooks
+        # scheduled by the writers run before this fires
+        return self.background.close()
@@ -0,0 +1,130 @@
+import re
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class StreamDecoder:
+    """Incrementally decodes a response body by its Content-Encoding."""
+
+    def __init__(self, content_encoding: str | None = None) -> None:
+        self.content_encoding = content_encoding
+
+        self._decompressor = None
+        if content_encoding in ("gzip", "x-gzip", "deflate"):
+            # Detects gzip and zlib headers, deflate can also come without
+            wbits = 32 + zlib.MAX_WBITS
+            self._decompressor = zlib.decompressobj(wbits)
+        elif content_encoding == "zstd":
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        elif content_encoding not in (None, "identity"):
+            raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+    @classmethod
+    def from_headers(cls, headers):
+        """
+        Decoder for a response's headers.
+
+        Returns:
+            StreamDecoder | None: None if the encoding isn't supported.
+        """
+        encodings = headers.getlist("Content-Encoding")
+        if len(encodings) > 1:
+            return None
+
+        encoding = encodings[0].decode("latin-1").strip().lower() if encodings else None
+        if encoding == "zstd" and zstandard is None:
+            return None
+
+        try:
+            return cls(encoding)
+        except ValueError:
+            return None
+
+    def decode(self, data: bytes) -> bytes:
+        if self._decompressor is None:
+            return data
+        return self._decompressor.decompress(data)
+
+
+class BodyPrefixScanner:
+    """
+    Searches the beginning of a response body for a pattern while the body
+    is being downloaded, so a download can be stopped as soon as the
+    pattern tells enough about the page.
+
+    Every chunk is searched together with the last max_match_bytes before
+    it, which is all that is kept of earlier chunks. Each byte is searched
+    a bounded number of times no matter how small the chunks are, and
+    matches longer than max_match_bytes that span chunks can be missed.
+    """
+
+    def __init__(
+        self,
+        pattern: re.Pattern,
+        decoder: StreamDecoder,
+        max_bytes: int,
+        expected_bytes: int = -1,
+        max_match_bytes: int = 1024,
+    ) -> None:
+        """
+        Args:
+            pattern (re.Pattern): Bytes pattern to search for.
+            decoder (StreamDecoder): Decoder of the received chunks.
+            max_bytes (int): Decoded bytes to search before giving up.
+            expected_bytes (int): Body size on the wire, -1 if unknown.
+            max_match_bytes (int): Longest match to find across chunks.
+        """
+        self.pattern = pattern
+        self.decoder = decoder
+        self.max_bytes = max_bytes
+        self.expected_bytes = expected_bytes
+        self.max_match_bytes = max_match_bytes
+
+        self.received_bytes = 0
+        self.decoded_bytes = 0
+        self.done = False
+
+        # End of the data searched so far, where a match can still start
+        self._tail = b""
+
+    def feed(self, data: bytes) -> re.Match | None:
+        """
+        Search received data, together with the end of the data before it.
+
+        Returns:
+            re.Match | None: Pattern match, once found.
+        """
+        if self.done:
+            return None
+
+        self.received_bytes += len(data)
+
+        try:
+            decoded = self.decoder.decode(data)
+        except Exception:
+            # Leave broken bodies to the regular response handling
+            self.done = True
+            return None
+
+        self.decoded_bytes += len(decoded)
+
+        # Matches starting earlier would be complete already, or longer
+        # than max_match_bytes
+        data = self._tail + decoded
+        self._tail = data[-self.max_match_bytes :]
+
+        match = self.pattern.search(data)
+        if match is not None or self.decoded_bytes >= self.max_bytes:
+            self.done = True
+            self._tail = b""
+
+        return match
+
+    @property
+    def remaining_bytes(self) -> int:
+        """Body bytes not received yet, 0 if the body size isn't known."""
+        return max(self.expected_bytes - self.received_bytes, 0)
@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import hashlib
+
+from pathlib import Path
+from datetime import datetime
+from typing import Iterator, NamedTuple
+
+try:
+    from grabeklis.fileio import (
+        compress_bytes,
+        compression_from_name,
+        compression_suffix,
+        decompress_bytes,
+    )
+except ModuleNotFoundError:
+    from fileio import compress_bytes, compression_from_name, compression_suffix, decompress_bytes
+
+
+class StoredPage(NamedTuple):
+    url: str
+    digest: str
+    encoding: str
+    # Best estimate of when the download started, naive local time
+    fetched: datetime
+
+
+class RawPageStore:
+    """
+    Downloaded page bodies, compressed and stored by content hash, with
+    a SQLite index of the latest page stored for every url.
+
+    Identical bodies are stored once, no matter how many urls or crawls
+    they come from.
+
+    Directory layout:
+        <store>/index.sqlite3
+        <store>/objects/<first 2 hash chars>/<sha256 of body>.html[.gz|.zst]
+    """
+
+    index_name = "index.sqlite3"
+    objects_name = "objects"
+    object_suffix = ".html"
+
+    # Number of stored pages kept in an open transaction before committing
+    commit_every = 100
+
+    def __init__(self, path: Path, compression: str | None = "gzip") -> None:
+        self.path = Path(path)
+        self.index_path = self.path / self.index_name
+        self.objects_dir = self.path / self.objects_name
+
+        self.compression = compression
+        self.suffix = self.object_suffix + compression_suffix(compression)
+
+        self._conn = None
+        self._num_pending = 0
+
+    def exists(self) -> bool:
+        return self.index_path.exists()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+            # Pages are written from a writer thread
+            self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, digest TEXT, encoding TEXT, fetched TEXT"
+                ") WITHOUT ROWID"
+            )
+            self._conn.commit()
+
+        return self._conn
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def __contains__(self, url: str) -> bool:
+        cursor = self.conn.execute("SELECT 1 FROM pages WHERE url = ?", (url,))
+        return cursor.fetchone() is not None
+
+    def __iter__(self) -> Iterator[StoredPage]:
+        """Stored pages in url order."""
+        rows = self.conn.execute(
+            "SELECT url, digest, encoding, fetched FROM pages ORDER BY url"
+        )
+        for url, digest, encoding, fetched in rows:
+            yield StoredPage(url, digest, encoding, datetime.fromisoformat(fetched))
+
+    def get(self, url: str) -> StoredPage | None:
+        cursor = self.conn.execute(
+            "SELECT url, digest, encoding, fetched FROM pages WHERE url = ?", (url,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+
+        url, digest, encoding, fetched = row
+        return StoredPage(url, digest, encoding, datetime.fromisoformat(fetched))
+
+    def object_path(self, digest: str, suffix: str | None = None) -> Path:
+        suffix = self.suffix if suffix is None else suffix
+        return self.objects_dir / digest[:2] / f"{digest}{suffix}"
+
+    def put(self, url: str, body: bytes, encoding: str, fetched: datetime) -> str:
+        """
+        Store a page body for url, replacing the url's previous page.
+
+        Returns:
+            str: Content hash of the body.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+
+        if self._find_object(digest) is None:
+            path = self.object_path(digest)
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Objects only appear complete under their final name. Several
+            # crawler processes can store the same page at the same time
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as file:
+                file.write(compress_bytes(body, self.compression))
+            os.replace(tmp_path, path)
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, digest, encoding, fetched) VALUES (?, ?, ?, ?)",
+            (url, digest, encoding, fetched.isoformat()),
+        )
+
+        self._num_pending += 1
+        if self._num_pending >= self.commit_every:
+            self.commit()
+
+        return digest
+
+    def read(self, digest: str) -> bytes:
+        """Page body by its content hash."""
+        path = self._find_object(digest)
+        if path is None:
+            raise KeyError(digest)
+
+        with open(path, "rb") as file:
+            return decompress_bytes(file.read(), compression_from_name(path))
+
+    def _find_object(self, digest: str) -> Path | None:
+        # Objects stored with an earlier compression setting are still valid
+        path = self.object_path(digest)
+        if path.exists():
+            return path
+
+        for path in self.object_path(digest, "").parent.glob(f"{digest}{self.object_suffix}*"):
+            if not path.name.endswith(".tmp"):
+                return path
+
+        return None
+
+    def commit(self) -> None:
+        if self._conn is not None:
+            self._conn.commit()
+        self._num_pending = 0
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.commit()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,183 @@
+import re
+import bisect
+
+from datetime import datetime
+
+
+# Week of a weekly sitemap, e.g. 2023W41
+WEEK_RE = re.compile(r"^(\d{4})W(\d{1,2})$")
+
+
+def parse_week(week: str) -> tuple[int, int]:
+    """Year and week number of a week like 2023W41."""
+    match = WEEK_RE.match(week)
+    if match is None:
+        raise ValueError(f"Invalid week, expected e.g. 2023W41: {week}")
+    return int(match[1]), int(match[2])
+
+
+def format_week(week: tuple[int, int]) -> str:
+    return f"{week[0]}W{week[1]:02d}"
+
+
+class WeekStreak:
+    """
+    Number of consecutive weeks, newest first, with some property.
+
+    Weeks can finish in any order, but only count once all newer weeks
+    have finished too, so the streak is the same for any finishing order.
+    """
+
+    def __init__(self) -> None:
+        self.length = 0
+
+        # Rank -> whether the week has the property, of weeks not counted yet
+        self._waiting = {}
+        self._next_rank = 0
+
+    def add(self, rank: int, matches: bool) -> int:
+        """Add a finished week, returns the streak length."""
+        self._waiting[rank] = matches
+
+        while self._next_rank in self._waiting:
+            if self._waiting.pop(self._next_rank):
+                self.length += 1
+            else:
+                self.length = 0
+            self._next_rank += 1
+
+        return self.length
+
+
+class WeeklySitemapWalk:
+    """
+    Order in which weekly sitemaps are requested: newest week first, a few
+    weeks at a time, and no older weeks once enough consecutive weeks
+    turned out to have no new articles.
+
+    Weeks are ranked by age, 0 being the newest. Ranks also serve as
+    article priorities, so articles of newer weeks are downloaded first.
+    """
+
+    def __init__(self, in_flight: int = 2, stop_after_empty: int = 0) -> None:
+        """
+        Args:
+            in_flight (int): Weekly sitemaps requested at the same time.
+            stop_after_empty (int): Consecutive weeks without new articles
+                after which older weeks aren't requested, 0 never stops.
+        """
+        self.in_flight = max(in_flight, 1)
+        self.stop_after_empty = stop_after_empty
+
+        # (-timestamp, url) of weeks not requested yet, newest first
+        self._pending = []
+        self._added = set()
+        self._requested = {}
+
+        self._num_done = 0
+        self._empty_streak = WeekStreak()
+
+        self.stopped = False
+
+    def add(self, url: str, week_start: datetime) -> None:
+        """Add a weekly sitemap found in a sitemap index."""
+        if url in self._added:
+            return
+        self._added.add(url)
+        bisect.insort(self._pending, (-week_start.timestamp(), url))
+
+    def next_weeks(self) -> list[tuple[int, str]]:
+        """
+        Weekly sitemaps to request now.
+
+        Returns:
+            list[tuple[int, str]]: Rank and url of each week.
+        """
+        weeks = []
+        while (
+            not self.stopped
+            and self._pending
+            and len(self._requested) - self._num_done < self.in_flight
+        ):
+            _, url = self._pending.pop(0)
+            rank = len(self._requested)
+            self._requested[url] = rank
+            weeks.append((rank, url))
+
+        return weeks
+
+    def done(self, rank: int, num_new: int | None) -> list[tuple[int, str]]:
+        """
+        Record a weekly sitemap as parsed.
+
+        Args:
+            rank (int): Rank of the week, from next_weeks.
+            num_new (int | None): New articles found, None if unknown,
+                e.g. because the sitemap failed to download.
+
+        Returns:
+            list[tuple[int, str]]: Weeks to request next, see next_weeks.
+        """
+        self._num_done += 1
+
+        num_empty = self._empty_streak.add(rank, num_new == 0)
+        if self.stop_after_empty > 0 and num_empty >= self.stop_after_empty:
+            self.stopped = True
+
+        return self.next_weeks()
+
+    def stop(self) -> None:
+        """Don't request any more weeks."""
+        self.stopped = True
+
+    @property
+    def num_not_requested(self) -> int:
+        return len(self._pending)
+
+
+class HistoryFrontier:
+    """
+    Detects when the crawl walks past the url history frontier: weeks
+    older than it were already scraped in full by earlier runs.
+
+    The frontier is reached once enough consecutive weeks, newest first,
+    have at least min_known_ratio of their article urls in the history.
+    """
+
+    def __init__(self, weeks: int, min_known_ratio: float = 1.0) -> None:
+        """
+        Args:
+            weeks (int): Consecutive known weeks that make the frontier,
+                0 never reaches it.
+            min_known_ratio (float): Share of known urls of a known week.
+        """
+        self.weeks = weeks
+        self.min_known_ratio = min_known_ratio
+
+        self._known_streak = WeekStreak()
+        self.reached = False
+
+    def add(self, rank: int, num_known: int | None, num_articles: int | None) -> bool:
+        """
+        Add a finished week.
+
+        Args:
+            rank (int): Rank of the week, 0 being the newest.
+            num_known (int | None): Article urls already in the history,
+                None if unknown, e.g. because the sitemap failed.
+            num_articles (int | None): Article urls in the week's sitemap.
+
+        Returns:
+            bool: True if the frontier is reached.
+        """
+        if num_known is None or num_articles is None:
+            known = False
+        else:
+            # Weeks without articles have nothing left to scrape either
+            known = num_known >= self.min_known_ratio * num_articles
+
+        num_weeks = self._known_streak.add(rank, known)
+        if self.weeks > 0 and num_weeks >= self.weeks:
+            self.reached = True
+
+        return self.reached
@@ -18,6 +18,63 @@ STATS_CLASS = "grabeklis.stats_collector.DefaultStatsCollector"
 
 PROJECT_DIR = os.path.join(os.path.expanduser("~"), "Documents", "grabeklis")
 
+# Scraped articles are saved to a new batch file once their serialized size
+# or count reaches these limits (0 disables a limit)
+BATCH_FILE_MAX_BYTES = 5 * 1024 * 1024
+BATCH_FILE_MAX_ITEMS = 1000
+# Batch file compression: None, "gzip" or "zstd" (needs the zstandard package)
+BATCH_FILE_COMPRESSION = None
+# Compression of new archive segments, same options. Existing segments are
+# read as they are, so this can be changed at any time
+ARCHIVE_COMPRESSION = None
+# Items queued for the background writer thread before item processing waits
+WRITER_MAX_PENDING = 100
+
+# Stop downloading article pages once their category turns out to be ignored,
+# looking for it in this many (uncompressed) bytes from the start of the page
+CATEGORY_PREFILTER_ENABLED = True
+CATEGORY_PREFILTER_MAX_BYTES = 256 * 1024
+
+# Worker processes extracting articles from downloaded pages, 0 extracts them
+# in the crawler process. At most PARSE_MAX_PENDING pages wait for the workers
+PARSE_WORKERS = 0
+PARSE_MAX_PENDING = 32
+
+# Worker processes validating batch files before they are archived, one per
+# CPU by default. Files are validated in the crawler process with 1 worker
+VALIDATION_WORKERS = None
+
+# Keep downloaded article pages, so articles can be extracted again offline
+# with "python -m grabeklis.handlers reextract". Pages are stored once per
+# content, compressed with RAW_STORE_COMPRESSION (None, "gzip" or "zstd")
+RAW_STORE_ENABLED = True
+RAW_STORE_COMPRESSION = "gzip"
+
+# Bloom filter in front of the url history, rebuilt with archive summaries.
+# Answers "definitely not scraped" without touching the history database.
+HISTORY_BLOOM_ENABLED = True
+HISTORY_BLOOM_ERROR_RATE = 0.01
+
+# Skip weekly sitemaps whose articles were all resolved in earlier runs
+SITEMAP_CHECKPOINTS_ENABLED = True
+
+# Weekly sitemaps are requested newest first, this many at a time, and their
+# articles are downloaded newest week first. Older weeks aren't requested once
+# this many consecutive weeks had no new articles, 0 walks all weeks
+SITEMAP_WEEKS_IN_FLIGHT = 2
+SITEMAP_STOP_AFTER_EMPTY_WEEKS = 8
+
+# Stop walking older weekly sitemaps once this many consecutive weeks had at
+# least HISTORY_FRONTIER_MIN_KNOWN_RATIO of their article urls in the history,
+# the crawl then finishes on its own. 0 disables
+HISTORY_FRONTIER_WEEKS = 4
+HISTORY_FRONTIER_MIN_KNOWN_RATIO = 1.0
+
+# Without -a dt-from, only scrape articles newer than the start of the last
+# finished and archived run, minus an overlap for late sitemap updates
+DT_FROM_AUTO = False
+DT_FROM_AUTO_OVERLAP_HOURS = 24
+
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
 # USER_AGENT = "grabeklis (+http://www.yourdomain.com)"
@@ -31,6 +88,7 @@ CONCURRENT_REQUESTS = 10
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
 # See also autothrottle settings and docs
+# Only used with ADAPTIVE_THROTTLE_ENABLED = False
 DOWNLOAD_DELAY = 1
 # The download delay setting will honor only one of:
 # CONCURRENT_REQUESTS_PER_DOMAIN = 16
@@ -56,9 +114,13 @@ DOWNLOAD_DELAY = 1
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-# DOWNLOADER_MIDDLEWARES = {
-#    "grabeklis.middlewares.GrabeklisDownloaderMiddleware": 543,
-# }
+DOWNLOADER_MIDDLEWARES = {
+   # Sitemap revalidation stats, see HTTPCACHE_* below
+   "scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware": None,
+   "grabeklis.httpcache.SitemapHttpCacheMiddleware": 900,
+   # Sees 429/503 responses before RetryMiddleware (550)
+   "grabeklis.throttle.AdaptiveConcurrencyMiddleware": 600,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -68,9 +130,34 @@ DOWNLOAD_DELAY = 1
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-# ITEM_PIPELINES = {
-#    "grabeklis.pipelines.GrabeklisPipeline": 300,
-# }
+ITEM_PIPELINES = {
+   "grabeklis.pipelines.GrabeklisPipeline": 300,
+}
+
+# Adapt download delay and concurrency to the server instead of DOWNLOAD_DELAY,
+# see grabeklis.throttle. Sitemap and article requests have separate budgets,
+# starting from their delay and concurrency. Faster responses than the target
+# latency lower the delay and then raise concurrency up to max_concurrency,
+# slower ones do the opposite. 429/503 responses and timeouts back off,
+# honoring Retry-After up to max_delay. Decisions are in throttle/* stats
+ADAPTIVE_THROTTLE_ENABLED = True
+ADAPTIVE_THROTTLE_TARGET_LATENCY = 2.0
+ADAPTIVE_THROTTLE_BUDGETS = {
+   "sitemap": {
+      "concurrency": 1,
+      "max_concurrency": 2,
+      "delay": 1.0,
+      "min_delay": 0.5,
+      "max_delay": 60.0,
+   },
+   "article": {
+      "concurrency": 1,
+      "max_concurrency": 8,
+      "delay": 1.0,
+      "min_delay": 0.0,
+      "max_delay": 60.0,
+   },
+}
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -87,9 +174,13 @@ DOWNLOAD_DELAY = 1
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-# HTTPCACHE_ENABLED = True
-# HTTPCACHE_EXPIRATION_SECS = 0
-# HTTPCACHE_DIR = "httpcache"
+# Only sitemaps are cached. They are revalidated with conditional requests on
+# every run and their cached copy is reused when the server answers 304.
+HTTPCACHE_ENABLED = True
+HTTPCACHE_POLICY = "grabeklis.httpcache.SitemapCachePolicy"
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = os.path.join(PROJECT_DIR, "httpcache")
+HTTPCACHE_GZIP = True
 # HTTPCACHE_IGNORE_HTTP_CODES = []
 # HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
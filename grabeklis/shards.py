@@ -0,0 +1,170 @@
+import sys
+import argparse
+import subprocess
+
+from datetime import date, datetime
+from pathlib import Path
+
+from grabeklis import settings
+from grabeklis.handlers import ScrapedDataHandler
+from grabeklis.schedule import format_week, parse_week
+
+
+# Week after every week, the spider's default week-to
+LAST_WEEK = (9999, 99)
+
+# Where scrapy.cfg is, so scrapy finds the project from any working directory
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def weeks_in_year(year: int) -> int:
+    # December 28th is always in the last ISO week of its year
+    return date(year, 12, 28).isocalendar()[1]
+
+
+def week_range(first: tuple[int, int], last: tuple[int, int]) -> list[tuple[int, int]]:
+    """Weeks from first to last, inclusive, oldest first."""
+    weeks = []
+    year, week = first
+    while (year, week) <= last:
+        weeks.append((year, week))
+        if week >= weeks_in_year(year):
+            year, week = year + 1, 1
+        else:
+            week += 1
+
+    return weeks
+
+
+def previous_week(week: tuple[int, int]) -> tuple[int, int]:
+    """Week just before week when comparing (year, week) tuples."""
+    year, number = week
+    if number > 0:
+        return year, number - 1
+    return year - 1, LAST_WEEK[1]
+
+
+def split_weeks(
+    weeks: list, num_shards: int, last: tuple[int, int] = LAST_WEEK
+) -> list[tuple]:
+    """
+    Split weeks into contiguous ranges of nearly the same number of weeks.
+
+    Sitemap week numbers don't follow any one calendar, e.g. there are W00
+    and W53 weeks in years without an ISO week 53. Each range therefore
+    ends just before the next one starts, so every (year, week) from the
+    first week to last is in exactly one range.
+
+    Returns:
+        list[tuple]: First and last week of each range, in order. Fewer
+            than num_shards ranges if there are fewer weeks.
+    """
+    num_shards = max(min(num_shards, len(weeks)), 1)
+    size, extra = divmod(len(weeks), num_shards)
+
+    firsts = []
+    start = 0
+    for i in range(num_shards):
+        end = start + size + (i < extra)
+        if end > start:
+            firsts.append(weeks[start])
+        start = end
+
+    lasts = [previous_week(first) for first in firsts[1:]] + [last]
+    return list(zip(firsts, lasts))
+
+
+def shard_command(
+    spider: str,
+    run_name: str,
+    week_from: tuple[int, int],
+    week_to: tuple[int, int],
+    httpcache_dir: str,
+    extra_settings: list[str] = (),
+) -> list[str]:
+    command = [
+        sys.executable, "-m", "scrapy", "crawl", spider,
+        "-a", f"week-from={format_week(week_from)}",
+        "-a", f"week-to={format_week(week_to)}",
+        "-a", f"shard={run_name}",
+        "-s", f"HTTPCACHE_DIR={httpcache_dir}",
+    ]  # fmt: skip
+
+    for setting in extra_settings:
+        command.extend(["-s", setting])
+
+    return command
+
+
+def run_shards(commands: list[list[str]]) -> list[int]:
+    """Run shard crawls side by side, returns their exit codes."""
+    processes = [subprocess.Popen(command, cwd=PROJECT_ROOT) for command in commands]
+    return [process.wait() for process in processes]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Crawl ranges of weekly sitemaps in parallel processes"
+    )
+    parser.add_argument("--shards", type=int, default=4, help="Number of spider processes")
+    parser.add_argument("--from", dest="week_from", default="2014W01", help="e.g. 2014W01")
+    parser.add_argument("--to", dest="week_to", help="e.g. 2023W41, current week by default")
+    parser.add_argument("--spider", default="lsmsitemap")
+    parser.add_argument(
+        "-s", dest="settings", action="append", default=[], help="NAME=VALUE, for every shard"
+    )
+    parser.add_argument(
+        "--merge",
+        metavar="STAMP",
+        help="Only archive the shards of an earlier crawl, e.g. after fixing a shard",
+    )
+    args = parser.parse_args()
+
+    week_from = parse_week(args.week_from)
+    if args.week_to is None:
+        # Weeks are split up to now, the last shard also gets any later ones
+        year, week, _ = datetime.now().isocalendar()
+        week_to = (year, week)
+        last = LAST_WEEK
+    else:
+        week_to = last = parse_week(args.week_to)
+
+    ranges = split_weeks(week_range(week_from, week_to), args.shards, last)
+    if not ranges:
+        sys.exit(f"No weeks from {args.week_from} to {format_week(week_to)}")
+
+    handler = ScrapedDataHandler(args.spider)
+
+    if args.merge is not None:
+        # Shard numbers sort the same as the week ranges
+        run_dirs = handler.spider_data_dir.glob(f"{args.merge}_shard*")
+        run_names = sorted(path.name for path in run_dirs if path.is_dir())
+        if not run_names:
+            sys.exit(f"No shards of {args.merge} in {handler.spider_data_dir}")
+    else:
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        run_names = [f"{stamp}_shard{i:02d}" for i in range(len(ranges))]
+
+        commands = []
+        for i, (first, last) in enumerate(ranges):
+            # Scrapy's file cache isn't safe for several writers. The same
+            # shard gets the same cache on the next sharded crawl
+            httpcache_dir = str(Path(settings.HTTPCACHE_DIR) / f"shard{i:02d}")
+            commands.append(
+                shard_command(args.spider, run_names[i], first, last, httpcache_dir, args.settings)
+            )
+            print(f"{run_names[i]}: {format_week(first)} - {format_week(last)}")
+
+        exit_codes = run_shards(commands)
+
+        failed = [name for name, code in zip(run_names, exit_codes) if code != 0]
+        if failed:
+            # Shards only add to the url history once archived, so nothing
+            # is skipped if the crawl is repeated instead
+            sys.exit(
+                f"Shards failed, not archived: {', '.join(failed)}. Archive what "
+                f"all shards scraped with --merge {stamp}, or crawl again"
+            )
+
+    print(handler.merge_shard_runs(run_names))
+    handler.make_archive_summaries()
@@ -0,0 +1,97 @@
+import io
+import re
+
+from typing import Any, Iterator
+from urllib.parse import urlparse
+
+import lxml.etree
+
+
+# Sitemap index and weekly sitemaps, e.g. /assets/..._2023W41.xml
+SITEMAP_PATH_RE = re.compile(r"\.xml(\.gz)?$")
+
+
+def is_sitemap_url(url: str) -> bool:
+    return SITEMAP_PATH_RE.search(urlparse(url).path) is not None
+
+
+def local_name(tag: str) -> str:
+    """Tag name without its namespace."""
+    return tag.split("}", 1)[1] if "}" in tag else tag
+
+
+class StreamingSitemap:
+    """
+    Drop-in replacement for scrapy.utils.sitemap.Sitemap that parses the
+    sitemap one entry at a time.
+
+    Every <url> or <sitemap> element is turned into an entry as soon as it
+    ends and is then removed from the tree, so memory use stays flat no
+    matter how many entries the sitemap has. Entries are the same dicts
+    as Sitemap's and the document is parsed with the same parser options.
+
+    Entries can only be iterated once. A body without any elements has
+    type None instead of raising like Sitemap.
+    """
+
+    def __init__(self, xmltext: bytes) -> None:
+        self._events = lxml.etree.iterparse(
+            io.BytesIO(xmltext),
+            events=("start", "end"),
+            recover=True,
+            remove_comments=True,
+            resolve_entities=False,
+        )
+
+        self._root = None
+        self.type = None
+
+        # The first event is the start of the root element
+        try:
+            for _, elem in self._events:
+                self._root = elem
+                self.type = local_name(elem.tag)
+                break
+        except lxml.etree.XMLSyntaxError:
+            # Nothing to recover, e.g. an empty body
+            pass
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if self._root is None:
+            return
+
+        # Depth 1 is inside the root, where entry elements start and end
+        depth = 1
+        for event, elem in self._events:
+            if event == "start":
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+
+            entry = self.parse_entry(elem)
+
+            # Entry children were cleared along with the entry, previous
+            # entries are left over as empty elements in the root
+            elem.clear()
+            while elem.getprevious() is not None:
+                del self._root[0]
+
+            if "loc" in entry:
+                yield entry
+
+    @staticmethod
+    def parse_entry(elem) -> dict[str, Any]:
+        entry = {}
+        for child in elem:
+            name = local_name(child.tag)
+
+            if name == "link":
+                if "href" in child.attrib:
+                    entry.setdefault("alternate", []).append(child.get("href"))
+            else:
+                entry[name] = child.text.strip() if child.text else ""
+
+        return entry
@@ -1,117 +1,39 @@
 import re
-import sys
-import json
+import html
 import pytz
-import traceback
 
 from datetime import datetime, timedelta
 
 import scrapy
 from scrapy import signals
+from scrapy.exceptions import StopDownload
+from twisted.internet import threads
+from scrapy.utils.defer import maybe_deferred_to_future
 from scrapy.spiders import Spider, SitemapSpider
+from scrapy.spiders.sitemap import iterloc
 
-from grabeklis import utils
+from grabeklis.bloom import BloomFilter
+from grabeklis.checkpoints import SitemapCheckpoints, sitemap_fingerprint
 from grabeklis.items import LSMArticle
-from grabeklis.handlers import ScrapedDataHandler
-
-
-IGNORE_ARTICLE_CATEGORIES = (
-    "Apmaksāta informācija*",
-    "Spilgtākie video",
-    "Infografikas",
-    "YouTube apskats",
-    "Animācijas",
-    "Audio",
-    "Komiksi un karikatūras",
-    "Podkāsti",
-    "Raidījumi",
+from grabeklis.extract import (
+    ARTICLE_CATEGORY_RE,
+    IGNORE_ARTICLE_CATEGORIES,
+    is_ignored_url,
+    prepare_item_from_response,
+    tidy_string,
 )
+from grabeklis.parsing import ProcessParser
+from grabeklis.prefilter import BodyPrefixScanner, StreamDecoder
+from grabeklis.schedule import HistoryFrontier, WeeklySitemapWalk, parse_week
+from grabeklis.sitemap import StreamingSitemap
+from grabeklis.handlers import ScrapedDataHandler
+from grabeklis.stats_collector import find_last_stats
+from grabeklis.utils import LASTMOD_FORMAT, parse_lastmod
+from grabeklis.writer import BackgroundWriter
 
 
-def tidy_string(s: str) -> str:
-    """Common string parsing ops"""
-
-    # Remove newline characters
-    s = re.sub(r"\n", "", s)
-
-    # Remove non-breaking space character
-    # Used in articles to avoid situations where e.g. - is end of line
-    s = re.sub(r"\xa0", " ", s)
-
-    # Remove multiple consecutive spaces and leading/trailing spaces
-    s = re.sub(r"\s+", " ", s).strip()
-
-    if len(s) == 0:
-        raise RuntimeError("No information found.")
-
-    return s
-
-
-def prepare_item_from_response(response, dt_start: datetime):
-    """Extract and parse any relevant information from an article."""
-
-    try:
-        # First check article category.
-        # Some contain mostly audio, video or pictures. Those are excluded.
-        # Paid articles are also excluded.
-        category = response.xpath('//div[@class="info-item category"]/a/text()').get()
-        category = tidy_string(category)
-
-        if category in IGNORE_ARTICLE_CATEGORIES:
-            raise ValueError(f"Article category '{category}' in ignore list")
-
-        publish_date = response.xpath('//div[@class="info-item time"]/text()').get()
-        publish_date = tidy_string(publish_date)
-
-        # This year's dates don't have year, yesterday's date say yesterday etc.
-        publish_date = utils.parse_datetime(publish_date, dt_start)
-        publish_date = publish_date.strftime("%Y-%m-%d %H:%M")
-
-        # Main article <div>
-        article_div = response.xpath('//div[@class="article__body"]')
-
-        # Select text from <p> or <blockqoute> elements in article <div>
-        article_as_list = article_div.xpath(
-            "./p/text()|./blockquote/p/text()"
-        ).extract()
-
-        # Convert from list of strings to a single string
-        article = ""
-        for paragraph in article_as_list:
-            # Whitespace after end of sentence
-            article += " " + paragraph
-
-        article = tidy_string(article)
-
-        # Sometimes there is a <p> element inside <h2> with the text
-        lead_div = response.xpath('//h2[@class="article-lead"]')
-        
-        lead = lead_div.xpath("./text()|./following-sibling::p/text()").get()
-        if lead is None or len(lead) < 2:  # can be ' '
-            lead_parts = lead_div.xpath(".//text()|./following-sibling::p//text()").extract()
-            lead = " ".join(lead_parts).replace("  ", " ").strip()
-
-        lead = tidy_string(lead)
-
-        title = response.xpath('//h1[@class="article-title"]/text()').get()
-        title = tidy_string(title)
-
-        url = response.url
-
-        item = LSMArticle(
-            url=url,
-            datums=publish_date,
-            kategorija=category,
-            virsraksts=title,
-            kopsavilkums=lead,
-            raksts=article,
-        )
-
-    except Exception:
-        err = traceback.format_exc()
-        return LSMArticle(url=response.url, error=err)
-
-    return item
+# Weekly sitemap urls end with year and week number, e.g. _2023W41.xml
+WEEKLY_SITEMAP_RE = re.compile(r"_(\d{4})W(\d+).xml")
 
 
 class LSMTestSpider(Spider):
@@ -181,6 +103,9 @@ class LSMSitemapSpider(SitemapSpider):
     scrapy crawl <name> -a dt-from=20231012153000
     to limit articles no older than YYYYMMDDHHMMSS
 
+    scrapy crawl <name> -a dt-from=auto
+    to limit articles no older than the start of the last finished run
+
     scrapy crawl <name> -a save=false
     to not save results in files (useful for testing)
 
@@ -204,16 +129,11 @@ class LSMSitemapSpider(SitemapSpider):
     ]
 
     # Sitemap's datetime format
-    fmt = "%Y-%m-%dT%H:%M:%S%z"
+    fmt = LASTMOD_FORMAT
 
     # Timezone in which articles are published
     tz_info = pytz.timezone("Europe/Riga")
 
-    # RAM threshold for saving files in bytes
-    # Too high: Risk of losing more, slower pc
-    # Too low: Too many files for long runs
-    batch_file_size = 1024 * 20
-
     # Data handler here used to get directory names
     # In general used to test and join multiple run data
     data_handler = ScrapedDataHandler(name, mode="test")
@@ -225,15 +145,25 @@ class LSMSitemapSpider(SitemapSpider):
     archive_name = data_handler.ok_archive_name
     history_name = data_handler.ok_history_name
 
-    run_fail_name = data_handler.fail_run_name
+    run_fail_prefix = data_handler.fail_run_prefix
     fail_archive_name = data_handler.fail_archive_name
     fail_history_name = data_handler.fail_history_name
 
     this_run = {}
-    articles_ok = []
-    articles_failed = []
-    history_ok = set()
-    history_failed = set()
+
+    # Disk-backed url histories, queried directly instead of loaded
+    history_ok = data_handler.ok_history
+    history_failed = data_handler.fail_history
+
+    # Optional in-memory pre-check for history_ok
+    history_bloom = None
+
+    # Optional worker processes for article extraction
+    parser = None
+
+    # Optional store of downloaded article pages, written on its own thread
+    raw_store = data_handler.raw_store
+    raw_writer = None
 
     @classmethod
     def from_crawler(cls, crawler, *args, **kwargs):
@@ -256,32 +186,67 @@ class LSMSitemapSpider(SitemapSpider):
         # Connect a signal that triggers after spider closed
         # but process still running. Used for file output and logging.
         self.crawler = crawler
+        self.crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
         self.crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
         self.settings = crawler.settings
 
+        # Article pages in ignored categories are stopped mid-download
+        if self.settings.getbool("CATEGORY_PREFILTER_ENABLED"):
+            self.crawler.signals.connect(
+                self.headers_received, signal=signals.headers_received
+            )
+            self.crawler.signals.connect(
+                self.bytes_received, signal=signals.bytes_received
+            )
+
         # Spider run data dir is its start time parsed
         self.tstart = datetime.now(tz=self.tz_info)
         self.run_dir_name = self.tstart.strftime("%Y%m%d%H%M%S")
 
+        # Shards of a sharded crawl (grabeklis.shards) get their run dir from
+        # the launcher, which also archives them once all shards finish
+        self.shard = kwargs.get("shard")
+        if self.shard is not None:
+            self.run_dir_name = self.shard
+
+            # Other shards write to the same raw page index
+            self.raw_store.commit_every = 1
+
+        # Weekly sitemaps to crawl, inclusive, e.g. -a week-from=2023W01
+        self.week_from = parse_week(kwargs.get("week-from", "0001W00"))
+        self.week_to = parse_week(kwargs.get("week-to", "9999W99"))
+
         # This is where any output besides logs ends up
         self.spider_run_dir = self.spider_dir / self.run_dir_name
 
         self.archive_path = self.spider_dir / self.archive_name
         self.url_history_path = self.spider_dir / self.history_name
         self.failed_url_history_path = self.spider_dir / self.fail_history_name
-        self.failed_articles_path = self.spider_run_dir / self.run_fail_name
 
-        if self.url_history_path.exists():
-            with open(self.url_history_path, "r") as f:
-                self.history_ok = set(json.load(f))
+        # Urls scraped in this run. The persistent history is only
+        # updated once the articles are saved to a batch file by the pipeline.
+        self.history_run = set()
 
-        if self.failed_url_history_path.exists():
-            with open(self.failed_url_history_path, "r") as f:
-                self.history_failed = set(json.load(f))
+        bloom_path = self.data_handler.ok_bloom_path
+        if self.settings.getbool("HISTORY_BLOOM_ENABLED") and bloom_path.exists():
+            self.history_bloom = BloomFilter.load(bloom_path)
 
+        dt_from_auto = self.settings.getbool("DT_FROM_AUTO")
         if "dt-from" in kwargs:
-            # User-specified earliest datetime scraped
-            self.dt_from = datetime.strptime(kwargs["dt-from"], "%Y%m%d%H%M%S")
+            dt_from_auto = kwargs["dt-from"] == "auto"
+
+            if not dt_from_auto:
+                # User-specified earliest datetime scraped
+                self.dt_from = datetime.strptime(kwargs["dt-from"], "%Y%m%d%H%M%S")
+
+        if dt_from_auto:
+            last_start = self.last_run_start()
+            if last_start is not None:
+                overlap = self.settings.getfloat("DT_FROM_AUTO_OVERLAP_HOURS")
+                self.dt_from = last_start - timedelta(hours=overlap)
+                self.logger.info(f"Last finished run started at {last_start}")
+            else:
+                self.logger.info("No finished run found, scraping everything")
 
         # Add timezone info because scraped articles with timezone
         # Otherwise can't compare dates (naive vs. aware)
@@ -291,6 +256,44 @@ class LSMSitemapSpider(SitemapSpider):
             self.save_scraped = kwargs["save"].lower() == "false"
             self.logger.info(self.save_scraped)
 
+        # Weekly sitemaps that were complete and unchanged are skipped
+        self.checkpoints = None
+        if self.settings.getbool("SITEMAP_CHECKPOINTS_ENABLED"):
+            self.checkpoints = SitemapCheckpoints(
+                self.spider_dir / self.data_handler.sitemap_checkpoints_name
+            )
+
+        # Weekly sitemaps from sitemap indexes are requested newest first
+        self.weekly_walk = WeeklySitemapWalk(
+            in_flight=self.settings.getint("SITEMAP_WEEKS_IN_FLIGHT", 2),
+            stop_after_empty=self.settings.getint("SITEMAP_STOP_AFTER_EMPTY_WEEKS", 0),
+        )
+
+        # Older weekly sitemaps aren't requested once the history covers them
+        self.history_frontier = HistoryFrontier(
+            weeks=self.settings.getint("HISTORY_FRONTIER_WEEKS", 0),
+            min_known_ratio=self.settings.getfloat("HISTORY_FRONTIER_MIN_KNOWN_RATIO", 1.0),
+        )
+
+        # Weekly sitemaps parsed in this run:
+        # url -> fingerprint, unresolved article urls, if anything was left out
+        self.sitemap_progress = {}
+
+    def last_run_start(self):
+        """
+        Start time of the latest run that finished normally and was archived.
+
+        Run directory names are run start times in the spider's timezone.
+
+        Returns:
+            datetime | None: Naive start time, or None if there is no such run.
+        """
+        stats = find_last_stats(self.name, finish_reason="finished", archived_run=None)
+        if stats is None:
+            return None
+
+        return datetime.strptime(stats["archived_run"], "%Y%m%d%H%M%S")
+
     def sitemap_filter(self, entries):
         """
         Filter the entries in a sitemap based on their last modification date.
@@ -317,22 +320,253 @@ class LSMSitemapSpider(SitemapSpider):
                 which are given as a year and week number. We then compare that
                 with the last scrape date.
                 """
-                match = re.findall(r"_(\d{4})W(\d+).xml", url)
+                match = WEEKLY_SITEMAP_RE.findall(url)
                 if len(match) == 0:
                     continue
 
                 year, week = match[0]
+                if not self.week_from <= (int(year), int(week)) <= self.week_to:
+                    self.crawler.stats.inc_value("sitemaps/skipped_week_range")
+                    continue
+
                 entry_dtime = self.datetime_from_year_week(year, week)
+
+                if self.checkpoints is not None and self.checkpoints.is_sealed(
+                    url, entry_dtime
+                ):
+                    self.crawler.stats.inc_value("sitemaps/skipped_sealed")
+                    continue
+
+                # Weekly sitemaps are requested newest first
+                entry["week_start"] = entry_dtime
             else:
-                if url in self.history_ok:
+                if is_ignored_url(url):
+                    self.crawler.stats.inc_value("articles/skipped_url_category")
+                    continue
+
+                if self.is_scraped(url):
+                    # Counted towards the history frontier
+                    entry["known"] = True
                     continue
 
                 # Article urls
-                entry_dtime = datetime.strptime(entry["lastmod"], self.fmt)
+                entry_dtime = parse_lastmod(entry["lastmod"], self.fmt)
 
             if entry_dtime > self.dt_from:
                 yield entry
 
+    def _parse_sitemap(self, response):
+        """
+        Parse a sitemap, keeping track of weekly sitemap completion.
+
+        Sitemaps are parsed one entry at a time, and every entry goes
+        through the filter before the next one is parsed.
+
+        Weekly sitemaps that were complete in an earlier run and haven't
+        changed since are skipped entirely. A weekly sitemap that can't be
+        parsed counts as done with an unknown outcome, so the weekly walk
+        keeps going.
+        """
+        if response.url.endswith("/robots.txt"):
+            yield from super()._parse_sitemap(response)
+            return
+
+        body = self._get_sitemap_body(response)
+        if body is None:
+            self.logger.warning(f"Ignoring invalid sitemap: {response}")
+            yield from self.weekly_sitemap_done(response, None)
+            return
+
+        sitemap = StreamingSitemap(body)
+        if sitemap.type is None:
+            self.logger.warning(f"Ignoring invalid sitemap: {response}")
+            yield from self.weekly_sitemap_done(response, None)
+            return
+
+        if sitemap.type == "sitemapindex":
+            for entry in self.sitemap_filter(sitemap):
+                if "week_start" in entry:
+                    if any(x.search(entry["loc"]) for x in self._follow):
+                        self.weekly_walk.add(entry["loc"], entry["week_start"])
+                    continue
+
+                for loc in iterloc((entry,), self.sitemap_alternate_links):
+                    if any(x.search(loc) for x in self._follow):
+                        yield scrapy.Request(loc, callback=self._parse_sitemap)
+
+            yield from self.weekly_sitemap_requests(self.weekly_walk.next_weeks())
+
+            # Not expected from a weekly sitemap, but it still frees its slot
+            yield from self.weekly_sitemap_done(response, None)
+            return
+
+        if sitemap.type != "urlset":
+            self.logger.warning(f"Ignoring {sitemap.type} sitemap: {response}")
+            yield from self.weekly_sitemap_done(response, None)
+            return
+
+        # Articles of newer weeks are downloaded first
+        week_rank = response.meta.get("week_rank")
+        priority = -week_rank if week_rank is not None else 0
+
+        progress = None
+        if self.checkpoints is not None and WEEKLY_SITEMAP_RE.search(response.url):
+            fingerprint = sitemap_fingerprint(response.headers, body)
+            if self.checkpoints.is_complete(response.url, fingerprint):
+                self.crawler.stats.inc_value("sitemaps/skipped_unchanged")
+                # Every article was resolved, nothing is left to scrape
+                yield from self.weekly_sitemap_done(response, 0, 0, 0)
+                return
+
+            self.crawler.stats.inc_value("sitemaps/parsed_weekly")
+
+            progress = {"fingerprint": fingerprint, "pending": set(), "left_out": False}
+            self.sitemap_progress[response.url] = progress
+
+        # Article urls never tried before, all of them and the resolved ones
+        num_new = 0
+        num_articles = 0
+        num_known = 0
+
+        for entry in sitemap:
+            kept = list(self.sitemap_filter((entry,)))
+
+            for loc in iterloc(kept, self.sitemap_alternate_links):
+                for r, c in self._cbs:
+                    if r.search(loc):
+                        request = scrapy.Request(loc, callback=c, priority=priority)
+                        if progress is not None:
+                            request.meta["sitemap_url"] = response.url
+                            progress["pending"].add(request.url)
+
+                        if request.url not in self.history_failed:
+                            num_new += 1
+
+                        yield request
+                        break
+
+            loc = entry["loc"]
+            if is_ignored_url(loc) or not any(r.search(loc) for r, _ in self._cbs):
+                continue
+
+            # Scraped or failed before, either way resolved by an earlier run
+            known = entry.get("known", False) or loc in self.history_failed
+
+            num_articles += 1
+            num_known += known
+
+            # Articles filtered out for other reasons than history (e.g. dt-from)
+            # mean the sitemap isn't complete
+            if progress is None or kept or progress["left_out"]:
+                continue
+            if not known:
+                progress["left_out"] = True
+
+        yield from self.weekly_sitemap_done(response, num_new, num_known, num_articles)
+
+    def weekly_sitemap_requests(self, weeks):
+        """Requests for weekly sitemaps picked by the weekly walk."""
+        for rank, url in weeks:
+            self.crawler.stats.inc_value("sitemaps/weeks_requested")
+            yield scrapy.Request(
+                url,
+                callback=self._parse_sitemap,
+                errback=self.weekly_sitemap_failed,
+                # Ahead of articles, so the walk keeps going
+                priority=1,
+                meta={"week_rank": rank},
+            )
+
+    def weekly_sitemap_done(self, response, num_new, num_known=None, num_articles=None):
+        """Record a weekly sitemap as parsed and request the next weeks."""
+        week_rank = response.meta.get("week_rank")
+        if week_rank is None:
+            return
+
+        if num_articles:
+            self.logger.debug(
+                f"{num_known}/{num_articles} article urls known in {response.url}"
+            )
+
+        was_stopped = self.weekly_walk.stopped
+        if self.history_frontier.add(week_rank, num_known, num_articles):
+            self.weekly_walk.stop()
+
+        yield from self.weekly_sitemap_requests(self.weekly_walk.done(week_rank, num_new))
+
+        if self.weekly_walk.stopped and not was_stopped:
+            num_skipped = self.weekly_walk.num_not_requested
+            self.crawler.stats.set_value("sitemaps/weeks_not_requested", num_skipped)
+
+            if self.history_frontier.reached:
+                self.crawler.stats.set_value("history/frontier_reached_at", response.url)
+                self.logger.info(
+                    f"Passed the history frontier at {response.url}, "
+                    f"skipping {num_skipped} older weekly sitemaps"
+                )
+            else:
+                self.logger.info(
+                    f"No new articles in {self.weekly_walk.stop_after_empty} consecutive "
+                    f"weeks, skipping {num_skipped} older weekly sitemaps"
+                )
+
+    def weekly_sitemap_failed(self, failure):
+        # Unknown whether the week had new articles, keep walking
+        self.logger.warning(f"Weekly sitemap failed: {failure.request.url}: {failure.value}")
+        yield from self.weekly_sitemap_done(failure.request, None)
+
+    def resolve_sitemap_url(self, response):
+        """Mark article url as resolved in the weekly sitemap it came from."""
+        progress = self.sitemap_progress.get(response.meta.get("sitemap_url"))
+        if progress is None:
+            return
+
+        request_url = response.meta.get("redirect_urls", [response.request.url])[0]
+        progress["pending"].discard(request_url)
+
+    def save_sitemap_checkpoints(self):
+        checked = datetime.now(tz=self.tz_info)
+
+        num_complete = 0
+        for url, progress in self.sitemap_progress.items():
+            complete = not progress["left_out"] and len(progress["pending"]) == 0
+            self.checkpoints.update(url, progress["fingerprint"], complete, checked)
+            num_complete += complete
+
+        self.checkpoints.save()
+
+        return num_complete
+
+    def is_scraped(self, url, exact=False):
+        """
+        Check if url was scraped successfully, in this or any earlier run.
+
+        Args:
+            url (str): Article url.
+            exact (bool): Skip the bloom filter and always query the history.
+
+        Returns:
+            bool: True if the url was already scraped.
+        """
+        if url in self.history_run:
+            return True
+
+        if self.history_bloom is None or exact:
+            return url in self.history_ok
+
+        stats = self.crawler.stats
+        if url not in self.history_bloom:
+            stats.inc_value("history/bloom_negatives")
+            return False
+
+        # Bloom filter positives can be wrong, confirm with history
+        stats.inc_value("history/bloom_positives")
+        if url in self.history_ok:
+            return True
+
+        stats.inc_value("history/bloom_false_positives")
+        return False
+
     def datetime_from_year_week(self, year, week):
         """
         Convert a year and week number into a datetime object.
@@ -360,7 +594,7 @@ class LSMSitemapSpider(SitemapSpider):
 
         return result_date
 
-    def parse_article(self, response):
+    async def parse_article(self, response):
         """
         Parses the response of a request to scrape an article from the LSM.lv website.
 
@@ -387,41 +621,147 @@ class LSMSitemapSpider(SitemapSpider):
 
         self.logger.info(f"Scraping: {response.url}")
 
-        if response.url in self.history_ok:
+        # Any outcome below resolves the url
+        self.resolve_sitemap_url(response)
+
+        if self.is_scraped(response.url, exact=True):
             self.logger.info(f"Already scraped: {response.url}")
             return
         elif response.url in self.history_failed:
             self.logger.info(f"Already failed to scrape: {response.url}")
             return
 
-        item = prepare_item_from_response(response, dt_start)
-
-        if item.check_if_failed():
-            self.articles_failed.append(dict(item))
+        category = response.meta.get("ignored_category")
+        if category is not None:
+            # Download was stopped early, the body is incomplete
+            error = f"ValueError: Article category '{category}' in ignore list"
+            item = LSMArticle(url=response.url, error=error)
         else:
-            self.articles_ok.append(dict(item))
-            self.history_ok.add(response.url)
+            # Stored while the article is extracted
+            stored = self.store_raw_page(response, dt_start)
 
-        # Save results as an intermediate file when size is getting bigger
-        # Avoids memory issues and large info loss in case of errors
-        if self.save_scraped:
-            result_size = sys.getsizeof(self.articles_ok)
-            if result_size >= self.batch_file_size:
-                self.save_articles()
+            if self.parser is not None:
+                item = await self.parser.extract(response, dt_start)
+            else:
+                item = prepare_item_from_response(response, dt_start)
 
+            if stored is not None:
+                await maybe_deferred_to_future(stored)
+
+        if not item.check_if_failed():
+            self.history_run.add(response.url)
+
+        # Items are saved by GrabeklisPipeline
         yield item
 
-    def save_articles(self):
-        # Create output directory if it doesn't exist already
-        if not self.spider_run_dir.exists():
-            self.spider_run_dir.mkdir(parents=True)
+    def store_raw_page(self, response, dt_start):
+        """
+        Save the article page for extracting it again offline.
+
+        Returns:
+            Deferred | None: Fires once the page is stored.
+        """
+        if self.raw_writer is None:
+            return None
+
+        d = self.raw_writer.submit(
+            self.raw_store.put, response.url, response.body, response.encoding, dt_start
+        )
+        d.addCallbacks(self.raw_page_stored, self.raw_page_failed, errbackArgs=(response.url,))
+        return d
+
+    def raw_page_stored(self, digest):
+        self.crawler.stats.inc_value("raw_store/pages")
+
+    def raw_page_failed(self, failure, url):
+        # Losing a raw page doesn't affect the scraped article
+        self.crawler.stats.inc_value("raw_store/errors")
+        self.logger.error(f"Failed to store raw page {url}: {failure.getErrorMessage()}")
+
+    def headers_received(self, headers, body_length, request, spider):
+        """Start looking for the category in an article page body."""
+        if spider is not self or request.callback != self.parse_article:
+            return
+
+        decoder = StreamDecoder.from_headers(headers)
+        if decoder is None:
+            self.crawler.stats.inc_value("articles/prefilter_unsupported_encoding")
+            request.meta.pop("category_scan", None)
+            return
+
+        request.meta["category_scan"] = BodyPrefixScanner(
+            ARTICLE_CATEGORY_RE,
+            decoder,
+            max_bytes=self.settings.getint("CATEGORY_PREFILTER_MAX_BYTES"),
+            expected_bytes=body_length,
+        )
+
+    def bytes_received(self, data, request, spider):
+        """Stop downloading an article page once its category is ignored."""
+        scanner = request.meta.get("category_scan")
+        if scanner is None:
+            return
+
+        match = scanner.feed(data)
+        if scanner.done:
+            del request.meta["category_scan"]
+        if match is None:
+            return
+
+        category = html.unescape(match.group(1).decode("utf-8", errors="replace"))
+        try:
+            category = tidy_string(category)
+        except RuntimeError:
+            return
+
+        if category not in IGNORE_ARTICLE_CATEGORIES:
+            return
+
+        request.meta["ignored_category"] = category
+
+        stats = self.crawler.stats
+        stats.inc_value("articles/stopped_category")
+        stats.inc_value("articles/stopped_category_bytes_saved", scanner.remaining_bytes)
+
+        # Response with the partial body still goes to parse_article
+        raise StopDownload(fail=False)
+
+    def batch_saved(self, urls):
+        """Called by the pipeline once a batch file with these articles is on disk."""
+        if self.shard is not None:
+            # Recorded when the launcher archives the shards, so the articles
+            # of a crawl that wasn't archived aren't skipped by the next one
+            return
 
-        time_str = datetime.now().strftime("%Y%m%d%H%M%S")
-        file_path = self.spider_run_dir / f"{self.batch_prefix}_{time_str}.json"
-        with open(file_path, "w") as file:
-            json.dump(list(self.articles_ok), file)
+        # History can be updated incrementally
+        self.history_ok.update(urls)
+        if self.history_bloom is not None:
+            self.history_bloom.update(urls)
+
+    def spider_opened(self, spider):
+        # Stats aren't available yet when the spider is created
+        stats = self.crawler.stats
+        stats.set_value("dt_from", self.dt_from.isoformat())
+        if self.shard is not None:
+            stats.set_value("shard", self.shard)
+
+        workers = self.settings.getint("PARSE_WORKERS")
+        if workers > 0:
+            self.parser = ProcessParser(
+                workers, self.settings.getint("PARSE_MAX_PENDING"), stats=stats
+            )
+            stats.set_value("parsing/workers", workers)
 
-        self.articles_ok = []
+        if self.save_scraped and self.settings.getbool("RAW_STORE_ENABLED"):
+            self.raw_writer = BackgroundWriter(
+                max_pending=self.settings.getint("WRITER_MAX_PENDING"), stats=stats
+            )
+
+        if self.history_bloom is not None:
+            stats.set_value("history/bloom_bytes", self.history_bloom.nbytes)
+            stats.set_value(
+                "history/bloom_expected_fp_rate", self.history_bloom.expected_error_rate
+            )
 
     def spider_closed(self, spider, reason):
         """
@@ -437,20 +777,57 @@ class LSMSitemapSpider(SitemapSpider):
         tfinish = datetime.now().astimezone().isoformat()
         self.crawler.stats.set_value("finish_time_tz", tfinish)
 
+        if self.history_bloom is not None:
+            # Share of unseen urls that the bloom filter didn't rule out
+            stats = self.crawler.stats
+            negatives = stats.get_value("history/bloom_negatives", 0)
+            false_positives = stats.get_value("history/bloom_false_positives", 0)
+            if negatives + false_positives > 0:
+                fp_rate = false_positives / (negatives + false_positives)
+                stats.set_value("history/bloom_fp_rate", fp_rate)
+
+        if self.parser is not None:
+            # Every response was handled by now, workers are idle
+            self.parser.close()
+
         if not self.save_scraped:
             return
 
-        # Save ok items
-        if len(self.articles_ok) > 0:
-            self.save_articles()
+        # Pipelines are closed before this signal, so batch files are complete.
+        # Archiving is blocking I/O, run it off the reactor. Scrapy waits for
+        # the returned Deferred before finishing the crawl.
+        if self.raw_writer is not None:
+            d = self.raw_writer.close()
+            d.addCallback(lambda _: threads.deferToThread(self.archive_run))
+        else:
+            d = threads.deferToThread(self.archive_run)
+        d.addCallback(self.archive_run_done)
+        return d
 
-        # Save failed items
-        if len(self.articles_failed) > 0:
-            with open(self.failed_articles_path, "a", encoding="utf-8") as file:
-                json.dump(self.articles_failed, file, indent=4)
+    def archive_run(self):
+        """Add this run's data to the archives. Runs in a worker thread."""
+        if self.raw_writer is not None:
+            self.raw_store.commit()
+
+        if self.shard is not None:
+            return None
 
         info = self.data_handler.add_scraped_data_to_archives(self.run_dir_name)
         self.data_handler.make_archive_summaries()
 
+        # Only after the run's articles are safely archived
+        if self.checkpoints is not None:
+            info["sitemaps/completed_weekly"] = self.save_sitemap_checkpoints()
+
+        return info
+
+    def archive_run_done(self, info):
+        if info is None:
+            # Shard, archived by the launcher
+            return
+
+        # Marks the run as a starting point for dt-from=auto
+        self.crawler.stats.set_value("archived_run", self.run_dir_name)
+
         for key, value in info.items():
             self.crawler.stats.set_value(key, value)
@@ -1,3 +1,5 @@
+import json
+
 from datetime import datetime
 
 from scrapy.statscollectors import StatsCollector
@@ -7,20 +9,60 @@ from pathlib import Path
 from grabeklis import settings
 
 
+def stats_logs_dir(spider_name: str) -> Path:
+    prj_dir = Path(settings.PROJECT_DIR)
+    return prj_dir / "logs" / spider_name
+
+
+def find_last_stats(spider_name: str, **required) -> dict | None:
+    """
+    Find the stats of the latest run matching all required values.
+
+    Args:
+        spider_name (str): Spider name.
+        **required: Stat keys and the values they must have.
+            A value of None only requires the key to exist.
+
+    Returns:
+        dict | None: Stats of the matching run, or None.
+    """
+    logs_dir = stats_logs_dir(spider_name)
+    if not logs_dir.exists():
+        return None
+
+    # File names are run finish times, newest last
+    paths = sorted(p for p in logs_dir.glob("*.json") if p.name != "last.json")
+
+    for path in reversed(paths):
+        with open(path, "r") as file:
+            stats = json.load(file)
+
+        for key, value in required.items():
+            if key not in stats or (value is not None and stats[key] != value):
+                break
+        else:
+            return stats
+
+    return None
+
+
 class DefaultStatsCollector(StatsCollector):
     def _persist_stats(self, stats, spider):
         date = datetime.now().strftime("%Y%m%d%H%M%S")
 
         encoder = ScrapyJSONEncoder()
 
-        prj_dir = Path(settings.PROJECT_DIR)
-        logs_dir = prj_dir / "logs" / spider.name
+        logs_dir = stats_logs_dir(spider.name)
 
         if not logs_dir.exists():
             logs_dir.mkdir(parents=True)
 
+        # Shards of a sharded crawl can finish within the same second
+        shard = stats.get("shard")
+        name = date if shard is None else f"{date}_{shard}"
+
         # TODO: Log date doesn't match data date
-        fpath = logs_dir / f"{date}.json"
+        fpath = logs_dir / f"{name}.json"
         fpath_last = logs_dir / "last.json"
 
         with open(fpath, "w") as file:
@@ -0,0 +1,280 @@
+import time
+
+from email.utils import parsedate_to_datetime
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet.error import TimeoutError as ConnectionTimeoutError
+from twisted.internet.defer import TimeoutError
+
+from grabeklis.sitemap import is_sitemap_url
+
+
+def parse_retry_after(value: bytes | None, now: float | None = None) -> float | None:
+    """
+    Seconds to wait from a Retry-After header, given in seconds or as a date.
+
+    Returns:
+        float | None: None if missing or invalid.
+    """
+    if not value:
+        return None
+
+    value = value.decode("latin-1").strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        return None
+
+    now = time.time() if now is None else now
+    return max(retry_at.timestamp() - now, 0.0)
+
+
+class ConcurrencyBudget:
+    """
+    Download delay and concurrency of one kind of requests to one host,
+    adjusted from the responses they get.
+
+    Responses are judged in windows of as many responses as the current
+    concurrency (at least min_window), so a single slow response doesn't
+    change anything. After a fast window the delay is halved, and once it
+    is at its minimum, concurrency goes up by one. After a slow window
+    concurrency goes down by one, and once it is at one, the delay goes up.
+    An overloaded server (429/503) halves concurrency and at least doubles
+    the delay right away, honoring Retry-After up to max_delay. Further
+    overloads within the new delay are the same burst and don't back off
+    again.
+    """
+
+    min_window = 5
+
+    # Delay after an overload when the delay was zero
+    backoff_delay = 1.0
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        max_concurrency: int = 8,
+        delay: float = 1.0,
+        min_delay: float = 0.0,
+        max_delay: float = 60.0,
+        target_latency: float = 2.0,
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.target_latency = target_latency
+
+        self._num_responses = 0
+        self._num_slow = 0
+        self._backoff_until = float("-inf")
+
+    def on_response(self, latency: float | None) -> str | None:
+        """
+        Count a regular response.
+
+        Returns:
+            str | None: Decision made, if any: "delay_down", "increase",
+                "decrease" or "delay_up".
+        """
+        if latency is None:
+            return None
+
+        self._num_responses += 1
+        if latency > self.target_latency:
+            self._num_slow += 1
+
+        if self._num_responses < max(self.concurrency, self.min_window):
+            return None
+
+        slow = 2 * self._num_slow > self._num_responses
+        self._reset_window()
+
+        if not slow:
+            if self.delay > self.min_delay:
+                # Halving alone would never get to a zero delay
+                delay = self.delay / 2
+                self.delay = self.min_delay if delay < self.min_delay + 0.05 else delay
+                return "delay_down"
+            if self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                return "increase"
+            return None
+
+        if self.concurrency > 1:
+            self.concurrency -= 1
+            return "decrease"
+        if self.delay < self.max_delay:
+            self.delay = min(max(2 * self.delay, self.backoff_delay), self.max_delay)
+            return "delay_up"
+        return None
+
+    def on_overload(
+        self, retry_after: float | None = None, now: float | None = None
+    ) -> str | None:
+        """
+        Count a response or timeout telling that the server is overloaded.
+
+        Returns:
+            str | None: "backoff", None if already backing off.
+        """
+        now = time.monotonic() if now is None else now
+        if now < self._backoff_until:
+            return None
+
+        self._reset_window()
+
+        self.concurrency = max(self.concurrency // 2, 1)
+        delay = max(2 * self.delay, self.backoff_delay, retry_after or 0.0)
+        self.delay = min(delay, self.max_delay)
+        self._backoff_until = now + self.delay
+
+        return "backoff"
+
+    def _reset_window(self) -> None:
+        self._num_responses = 0
+        self._num_slow = 0
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Downloader middleware that adapts download delay and concurrency to how
+    the server responds, instead of a fixed DOWNLOAD_DELAY.
+
+    Sitemap and article requests get separate downloader slots per host,
+    each with its own ConcurrencyBudget configured by
+    ADAPTIVE_THROTTLE_BUDGETS. Runs before RetryMiddleware, so it sees the
+    429 and 503 responses that are retried.
+
+    Stats, per budget ("sitemap" or "article"):
+        throttle/<budget>/concurrency, delay: Current values.
+        throttle/<budget>/max_concurrency_reached: Highest concurrency.
+        throttle/<budget>/<decision>: Number of decisions of each kind.
+        throttle/<budget>/retry_after_max: Longest Retry-After, seconds.
+    """
+
+    overload_statuses = (429, 503)
+    timeout_errors = (TimeoutError, ConnectionTimeoutError)
+
+    def __init__(self, crawler) -> None:
+        settings = crawler.settings
+        if not settings.getbool("ADAPTIVE_THROTTLE_ENABLED"):
+            raise NotConfigured
+
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.target_latency = settings.getfloat("ADAPTIVE_THROTTLE_TARGET_LATENCY", 2.0)
+        self.budget_settings = settings.getdict("ADAPTIVE_THROTTLE_BUDGETS")
+
+        # Downloader slot key -> (budget name, budget)
+        self.budgets = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler)
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        return middleware
+
+    def spider_opened(self, spider):
+        for name in self.budget_settings:
+            self.record_values(name, self.new_budget(name), spider)
+
+    def new_budget(self, name: str) -> ConcurrencyBudget:
+        budget_settings = dict(self.budget_settings.get(name, {}))
+        budget_settings.setdefault("target_latency", self.target_latency)
+        return ConcurrencyBudget(**budget_settings)
+
+    def budget_name(self, request) -> str:
+        url = request.url
+        if is_sitemap_url(url) or url.endswith("/robots.txt"):
+            return "sitemap"
+        return "article"
+
+    def process_request(self, request, spider):
+        # Slot picked by someone else, leave it alone
+        if "download_slot" in request.meta:
+            return None
+
+        name = self.budget_name(request)
+        key = f"{urlparse_cached(request).hostname or ''}/{name}"
+        request.meta["download_slot"] = key
+
+        if key not in self.budgets:
+            self.budgets[key] = (name, self.new_budget(name))
+            self.apply(key)
+
+        return None
+
+    def process_response(self, request, response, spider):
+        key = request.meta.get("download_slot")
+        if key not in self.budgets:
+            return response
+
+        name, budget = self.budgets[key]
+        if response.status in self.overload_statuses:
+            retry_after = parse_retry_after(response.headers.get(b"Retry-After"))
+            if retry_after is not None:
+                self.stats.max_value(
+                    f"throttle/{name}/retry_after_max", retry_after, spider=spider
+                )
+            decision = budget.on_overload(retry_after)
+        else:
+            decision = budget.on_response(request.meta.get("download_latency"))
+
+        if decision is not None:
+            self.record(key, decision, spider)
+
+        return response
+
+    def process_exception(self, request, exception, spider):
+        key = request.meta.get("download_slot")
+        if key in self.budgets and isinstance(exception, self.timeout_errors):
+            _, budget = self.budgets[key]
+            decision = budget.on_overload()
+            if decision is not None:
+                self.record(key, decision, spider)
+
+        return None
+
+    def record(self, key: str, decision: str, spider) -> None:
+        self.apply(key)
+
+        name, budget = self.budgets[key]
+        self.stats.inc_value(f"throttle/{name}/{decision}", spider=spider)
+        self.record_values(name, budget, spider)
+
+        spider.logger.debug(
+            f"Throttle {key}: {decision}, concurrency {budget.concurrency}, "
+            f"delay {budget.delay:.2f}s"
+        )
+
+    def record_values(self, name: str, budget: ConcurrencyBudget, spider) -> None:
+        self.stats.set_value(f"throttle/{name}/concurrency", budget.concurrency, spider=spider)
+        self.stats.set_value(f"throttle/{name}/delay", budget.delay, spider=spider)
+        self.stats.max_value(
+            f"throttle/{name}/max_concurrency_reached", budget.concurrency, spider=spider
+        )
+
+    def apply(self, key: str) -> None:
+        """Set the budget's delay and concurrency on its downloader slot."""
+        _, budget = self.budgets[key]
+        downloader = self.crawler.engine.downloader
+
+        # Idle slots are dropped and later created again from these
+        slot_settings = downloader.per_slot_settings.setdefault(key, {})
+        slot_settings["concurrency"] = budget.concurrency
+        slot_settings["delay"] = budget.delay
+
+        slot = downloader.slots.get(key)
+        if slot is not None:
+            slot.concurrency = budget.concurrency
+            slot.delay = budget.delay
@@ -1,27 +1,120 @@
-from datetime import datetime, timedelta
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+
+
+# Sitemap lastmod, e.g. 2023-10-09T10:00:00+03:00
+LASTMOD_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+
+def parse_lastmod(lastmod: str, fmt: str = LASTMOD_FORMAT) -> datetime:
+    """
+    Same as datetime.strptime(lastmod, fmt), but several times faster for
+    lastmods like 2023-10-09T10:00:00+03:00.
+
+    Those are parsed with datetime.fromisoformat, which gives the same
+    datetime and timezone. Anything else goes through strptime, so what
+    is rejected and the errors raised don't change either.
+    """
+    if (
+        fmt == LASTMOD_FORMAT
+        and len(lastmod) == 25
+        and lastmod[10] == "T"
+        and lastmod[19] in "+-"
+        # fromisoformat is more lenient than strptime about dates and
+        # offset minutes, e.g. accepts 2023-W41-1 and +03:60
+        and lastmod[4] == lastmod[7] == "-"
+        and lastmod[23] in "012345"
+    ):
+        try:
+            return datetime.fromisoformat(lastmod)
+        except ValueError:
+            pass
+
+    return datetime.strptime(lastmod, fmt)
+
+
+LV_MONTH_NUMBERS = {
+    "janvāris": 1,
+    "februāris": 2,
+    "marts": 3,
+    "aprīlis": 4,
+    "maijs": 5,
+    "jūnijs": 6,
+    "jūlijs": 7,
+    "augusts": 8,
+    "septembris": 9,
+    "oktobris": 10,
+    "novembris": 11,
+    "decembris": 12,
+}
 
 
 def parse_datetime(datums: str, dt: datetime):
-    lv_month_numbers = {
-        "janvāris": 1,
-        "februāris": 2,
-        "marts": 3,
-        "aprīlis": 4,
-        "maijs": 5,
-        "jūnijs": 6,
-        "jūlijs": 7,
-        "augusts": 8,
-        "septembris": 9,
-        "oktobris": 10,
-        "novembris": 11,
-        "decembris": 12,
-    }
+    """
+    Parse an article's publish date, e.g. '5. jūnijs, 2013, 13:00',
+    '14. novembris, 17:29' (this year), 'Vakar, 19:54' or 'Šodien, 8:30'.
+
+    Args:
+        datums (str): Publish date as shown on the article page.
+        dt (datetime): When the page was downloaded. Only the day is used.
+
+    Returns:
+        datetime: Publish date.
+    """
+    return _parse_datetime(datums, dt.date())
+
 
+def parse_datetimes(datums, dt):
+    """
+    parse_datetime for a whole column of publish dates, each distinct
+    string is parsed once per download day.
+
+    Args:
+        datums (Iterable[str] | pandas.Series): Publish dates.
+        dt (datetime | Iterable[datetime] | pandas.Series): When the pages
+            were downloaded, the same for all rows or one per row, e.g.
+            for archived articles scraped on different days.
+
+    Returns:
+        list[datetime] | pandas.Series: Series with the same index for a Series.
+    """
+    is_series = hasattr(datums, "unique") and hasattr(datums, "map")
+
+    if isinstance(dt, datetime):
+        day = dt.date()
+
+        if is_series:
+            return datums.map({s: _parse_datetime(s, day) for s in datums.unique()})
+
+        parsed = {}
+        for s in datums:
+            if s not in parsed:
+                parsed[s] = _parse_datetime(s, day)
+
+        return [parsed[s] for s in datums]
+
+    # Šodien and Vakar depend on the day, other dates only on the year
+    parsed = {}
+    result = []
+    for s, row_dt in zip(datums, dt, strict=True):
+        key = (s, row_dt.date())
+        if key not in parsed:
+            parsed[key] = _parse_datetime(*key)
+        result.append(parsed[key])
+
+    if is_series:
+        return type(datums)(result, index=datums.index, name=datums.name)
+    return result
+
+
+# Articles published on the same few days are parsed over and over
+@lru_cache(maxsize=4096)
+def _parse_datetime(datums: str, day: date) -> datetime:
     str_parts = datums.split(",")
 
     if len(str_parts) == 3:
-        day, month_str = str_parts[0].split(". ")
-        month = lv_month_numbers[month_str]
+        day_num, month_str = str_parts[0].split(". ")
+        month = LV_MONTH_NUMBERS[month_str]
         year = str_parts[1]
         hour, min = str_parts[2].replace(" ", "").split(":")
 
@@ -29,28 +122,26 @@ def parse_datetime(datums: str, dt: datetime):
         hour, min = str_parts[1].replace(" ", "").split(":")
 
         if str_parts[0].lower() == "vakar":
-            yesterday = dt - timedelta(days=1)
-            day = yesterday.day
+            yesterday = day - timedelta(days=1)
+            day_num = yesterday.day
             month = yesterday.month
             year = yesterday.year
 
         elif str_parts[0].lower() == "šodien":
-            day = dt.day
-            month = dt.month
-            year = dt.year
+            day_num = day.day
+            month = day.month
+            year = day.year
 
         else:
             # Date without year -> current year
-            day, month_str = str_parts[0].split(". ")
-            month = lv_month_numbers[month_str]
-            year = dt.year
+            day_num, month_str = str_parts[0].split(". ")
+            month = LV_MONTH_NUMBERS[month_str]
+            year = day.year
 
-    date = datetime(
+    return datetime(
         year=int(year),
         month=int(month),
-        day=int(day),
+        day=int(day_num),
         hour=int(hour),
         minute=int(min),
     )
-
-    return date
@@ -0,0 +1,301 @@
+import math
+import multiprocessing
+
+from pathlib import Path
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from grabeklis.fileio import find_data_files, iter_records
+except ModuleNotFoundError:
+    from fileio import find_data_files, iter_records
+
+
+OK_KEYS = set(
+    (
+        "url",
+        "datums",
+        "kategorija",
+        "virsraksts",
+        "kopsavilkums",
+        "raksts",
+    )
+)
+
+FAILED_KEYS = set(("url", "error"))
+
+KNOWN_CATEGORIES = set(
+    (
+        "Cilvēkstāsti",
+        "Laika ziņas",
+        "Latvijā",
+        "Izklaide",
+        "Futbols",
+        "Mūzika",
+        "Māksla",
+        "Pasaulē",
+        "Tautas māksla",
+        "Ekonomika",
+        "Kilograms kultūras",
+        "Basketbols",
+        "Vide un dzīvnieki",
+        "Volejbols",
+        "Pilsētvide",
+        "Motoru sports",
+        "Ziņu analīze",
+        "Ziņas vieglajā valodā",
+        "Paraolimpiskais sports",
+        "Tehnoloģijas un zinātne",
+        "Hokejs",
+        "Ārpus ētera",
+        "Sports",
+        "Ekrāns",
+        "Skatuve",
+        "Literatūra",
+        "Vecāki un bērni",
+        "Teniss",
+        "Veselība",
+        "Cīņas",
+        "Bobslejs",
+        "Peldēšana",
+        "Dizains un arhitektūra",
+        "Ziemas sports",
+        "Dziesmu un deju svētki",
+        "Sarunas",
+        "Motori",
+        "Kultūrtelpa",
+        "Virtuve",
+        "Šī diena vēsturē",
+        "Olimpiskā kustība",
+        "Vēsture",
+        "Ikdienai",
+        "Skeletons",
+        "Kamanas",
+        "Vieglatlētika",
+        "Burāšana",
+        "Riteņbraukšana",
+        "Podkāsti",
+        "Ceļošana",
+        "Sporta politika",
+        "Tautas sports",
+        "Kas notiek Latvijā?",
+        "Handbols",
+        "Golfs",
+        "Regbijs",
+        "Biatlons",
+        "Florbols",
+        "Komiksi un karikatūras",
+        "Esejas",
+        "Airēšana",
+        "Dārzs un mājas",
+        "Eiropā",
+        "Vaļasprieki",
+        "Sociālo mediju apskati",
+        "Balvas",
+        "Pareizais viedoklis",
+        "Medijpratība",
+        "Animācijas",
+        "Infografikas",
+        "Raidījumi",
+        "Spēles",
+        "Apmaksāta informācija*",
+        "Eiropas spēles",
+        "Audio",
+        "Jāšanas sports",
+        "Spilgtākie video",
+        "Mans treneris",
+        "informācija",
+        "YouTube apskats",
+        "Skatpunkts",
+    )
+)
+
+# Fields of a scraped article that can't be empty
+NON_EMPTY_FIELDS = ("virsraksts", "kopsavilkums", "raksts")
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# Problems kept per file, the rest are only counted
+MAX_PROBLEMS = 20
+
+
+class BatchFileResult(NamedTuple):
+    path: Path
+    # "ok" for scraped articles, "failed" for failed scrapes
+    kind: str
+    num_records: int
+    num_invalid: int
+    # (line number, description) of the first invalid records
+    problems: list
+
+    @property
+    def ok(self) -> bool:
+        return self.num_invalid == 0
+
+
+def is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+@lru_cache(maxsize=4096)
+def is_valid_date(value: str) -> bool:
+    try:
+        datetime.strptime(value, DATE_FORMAT)
+    except ValueError:
+        return False
+    return True
+
+
+def ok_record_problems(item: dict) -> list[str]:
+    """Everything wrong with a scraped article record."""
+    keys = set(item)
+    if keys != OK_KEYS:
+        return [f"keys {sorted(keys)} instead of {sorted(OK_KEYS)}"]
+
+    problems = [f"missing {key}" for key, value in item.items() if is_missing(value)]
+    if problems:
+        return problems
+
+    if not isinstance(item["datums"], str) or not is_valid_date(item["datums"]):
+        problems.append(f"invalid datums {item['datums']!r}")
+
+    # Unhashable values can't be looked up in the set
+    kategorija = item["kategorija"]
+    if not isinstance(kategorija, str) or kategorija not in KNOWN_CATEGORIES:
+        problems.append(f"unknown kategorija {kategorija!r}")
+
+    for key in NON_EMPTY_FIELDS:
+        value = item[key]
+        if not isinstance(value, str):
+            problems.append(f"invalid {key} {value!r}")
+        elif not value.strip():
+            problems.append(f"empty {key}")
+
+    return problems
+
+
+def failed_record_problems(item: dict) -> list[str]:
+    """Everything wrong with a failed scrape record."""
+    keys = set(item)
+    if keys != FAILED_KEYS:
+        return [f"keys {sorted(keys)} instead of {sorted(FAILED_KEYS)}"]
+    return []
+
+
+def validate_batch_file(path: Path, kind: str) -> BatchFileResult:
+    """
+    Check every record of a batch file, reading the file once.
+
+    Args:
+        path (Path): Batch file of scraped articles or failed scrapes.
+        kind (str): "ok" or "failed".
+
+    Returns:
+        BatchFileResult: Record counts and the first problems found.
+    """
+    if kind == "ok":
+        record_problems = ok_record_problems
+    elif kind == "failed":
+        record_problems = failed_record_problems
+    else:
+        raise ValueError(f"Invalid batch file kind: {kind}")
+
+    num_records = 0
+    num_invalid = 0
+    problems = []
+
+    for line_num, item in enumerate(iter_records(path), start=1):
+        num_records += 1
+
+        item_problems = record_problems(item)
+        if not item_problems:
+            continue
+
+        num_invalid += 1
+        for problem in item_problems:
+            if len(problems) < MAX_PROBLEMS:
+                problems.append((line_num, problem))
+
+    return BatchFileResult(Path(path), kind, num_records, num_invalid, problems)
+
+
+def validate_batch_files(
+    ok_paths: list[Path], failed_paths: list[Path], workers: int | None = None
+) -> list[BatchFileResult]:
+    """
+    Validate batch files, several files at a time in worker processes.
+
+    Args:
+        ok_paths (list[Path]): Batch files of scraped articles.
+        failed_paths (list[Path]): Batch files of failed scrapes.
+        workers (int | None): Worker processes, one per CPU by default.
+            With 1 worker or a single file, files are validated in process.
+
+    Returns:
+        list[BatchFileResult]: Results in the order of the given files.
+    """
+    paths = list(ok_paths) + list(failed_paths)
+    kinds = ["ok"] * len(ok_paths) + ["failed"] * len(failed_paths)
+
+    workers = min(workers or multiprocessing.cpu_count(), len(paths))
+    if workers <= 1:
+        return [validate_batch_file(path, kind) for path, kind in zip(paths, kinds)]
+
+    # Spawned rather than forked, the crawler process runs threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return list(executor.map(validate_batch_file, paths, kinds))
+
+
+def find_batch_files(
+    data_dir: Path,
+    spider_dir: str | None = None,
+    run_dir: str | None = None,
+    *,
+    batch_prefix: str,
+    fail_run_prefix: str,
+) -> tuple[list[Path], list[Path]]:
+    """
+    Batch files in a data directory: of one run, of all runs of a spider
+    or of all runs of all spiders.
+
+    Args:
+        batch_prefix (str): File name prefix of scraped article files.
+        fail_run_prefix (str): File name prefix of failed scrape files.
+            Both come from ScrapedDataHandler, which names the files.
+
+    Returns:
+        tuple[list[Path], list[Path]]: Scraped article and failed scrape files.
+    """
+    if spider_dir and run_dir:
+        run_dirs = [Path(data_dir) / spider_dir / run_dir]
+    elif spider_dir:
+        run_dirs = [obj for obj in (Path(data_dir) / spider_dir).glob("*") if obj.is_dir()]
+    elif not run_dir:
+        run_dirs = [obj for obj in Path(data_dir).rglob("*") if obj.is_dir()]
+    else:
+        raise RuntimeError("'dir' argument also needs 'spider'")
+
+    ok_paths = []
+    failed_paths = []
+    for path in run_dirs:
+        ok_paths += find_data_files(path, batch_prefix)
+        failed_paths += find_data_files(path, fail_run_prefix)
+
+    return ok_paths, failed_paths
+
+
+def format_problems(results: list[BatchFileResult]) -> str:
+    """Human readable summary of the invalid files in results."""
+    lines = []
+    for result in results:
+        if result.ok:
+            continue
+
+        lines.append(f"{result.path}: {result.num_invalid}/{result.num_records} invalid records")
+        for line_num, problem in result.problems:
+            lines.append(f"    line {line_num}: {problem}")
+
+    return "\n".join(lines)
@@ -0,0 +1,61 @@
+from twisted.internet import threads
+from twisted.internet.defer import Deferred, DeferredList, DeferredSemaphore
+from twisted.python.threadpool import ThreadPool
+
+
+class BackgroundWriter:
+    """
+    Runs blocking file I/O on a dedicated thread, off the reactor.
+
+    Calls run one at a time in submission order. At most ``max_pending``
+    calls are queued on the thread; further calls wait on the reactor
+    side, and the Deferreds returned to callers fire late, which is how
+    backpressure reaches e.g. Scrapy's item processing.
+    """
+
+    def __init__(self, max_pending: int = 100, stats=None) -> None:
+        self.max_pending = max_pending
+        self.stats = stats
+
+        self._pool = ThreadPool(minthreads=1, maxthreads=1, name="grabeklis-writer")
+        self._pool.start()
+
+        self._semaphore = DeferredSemaphore(max_pending)
+        self._pending = set()
+
+    def submit(self, func, *args, **kwargs) -> Deferred:
+        """
+        Run func(*args, **kwargs) on the writer thread.
+
+        Returns:
+            Deferred: Fires with the result of func.
+        """
+        if self.stats is not None and self._semaphore.tokens == 0:
+            # Disk is falling behind
+            self.stats.inc_value("writer/backpressure_waits")
+
+        # Imported here, importing this module must not install a reactor
+        from twisted.internet import reactor
+
+        d = self._semaphore.run(
+            threads.deferToThreadPool, reactor, self._pool, func, *args, **kwargs
+        )
+
+        self._pending.add(d)
+        d.addBoth(self._done, d)
+
+        return d
+
+    def _done(self, result, d):
+        self._pending.discard(d)
+        return result
+
+    def drain(self) -> Deferred:
+        """Fires once every submitted call has finished."""
+        return DeferredList(list(self._pending), consumeErrors=True)
+
+    def close(self) -> Deferred:
+        """Drain submitted calls and stop the writer thread."""
+        d = self.drain()
+        d.addBoth(lambda _: self._pool.stop())
+        return d
@@ -0,0 +1,129 @@
+import gc
+import warnings
+
+import pytest
+
+from grabeklis.archive import JsonlArchive, migrate_json_archive
+
+
+class TestJsonlArchive:
+    def test_append_and_read(self, tmp_path):
+        archive = JsonlArchive(tmp_path / "archive")
+        records = [{"url": "a", "raksts": "Ā"}, {"url": "b", "raksts": "b"}]
+
+        assert archive.append(records, "run1") == 2
+
+        reopened = JsonlArchive(tmp_path / "archive")
+        assert list(reopened.iter_records()) == records
+        assert len(reopened) == 2
+        assert reopened.has_run("run1")
+
+    def test_segment_rotation(self, tmp_path):
+        archive = JsonlArchive(tmp_path / "archive", segment_max_bytes=10)
+        records = [{"url": str(i)} for i in range(5)]
+
+        # Segment files are closed on rotation, not left to the garbage collector
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            archive.append(records[:2])
+            archive.append(records[2:])
+            gc.collect()
+
+        assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+
+        assert len(archive.manifest["segments"]) == 5
+        assert list(archive.iter_records()) == records
+
+    def test_uncommitted_bytes_ignored(self, tmp_path):
+        archive = JsonlArchive(tmp_path / "archive")
+        archive.append([{"url": "a"}])
+
+        # Simulate an append interrupted before the manifest was saved
+        segment = tmp_path / "archive" / archive.manifest["segments"][0]["name"]
+        with open(segment, "ab") as file:
+            file.write(b'{"url": "partial')
+
+        assert list(JsonlArchive(tmp_path / "archive").iter_records()) == [{"url": "a"}]
+
+        archive.append([{"url": "b"}])
+        assert list(archive.iter_records()) == [{"url": "a"}, {"url": "b"}]
+
+    def test_migrate_json_archive(self, tmp_path):
+        legacy = tmp_path / "archive_ok.json"
+        legacy.write_text('[{"url": "a"}, {"url": "b"}]', encoding="utf-8")
+
+        archive = JsonlArchive(tmp_path / "archive_ok")
+        assert migrate_json_archive(legacy, archive) == 2
+        assert [r["url"] for r in archive.iter_records()] == ["a", "b"]
+
+    def test_key_index(self, tmp_path):
+        def key_func(record):
+            return record["url"]
+
+        archive = JsonlArchive(tmp_path / "archive", key_func=key_func)
+        archive.append([{"url": "a"}, {"url": "b"}])
+
+        reopened = JsonlArchive(tmp_path / "archive", key_func=key_func)
+        assert set(reopened.keys) == {"a", "b"}
+        assert "a" in reopened.keys and "c" not in reopened.keys
+
+    def test_key_index_rebuilt_for_migrated_archive(self, tmp_path):
+        JsonlArchive(tmp_path / "archive").append([{"url": "a"}])
+
+        archive = JsonlArchive(tmp_path / "archive", key_func=lambda r: r["url"])
+        assert set(archive.keys) == {"a"}
+
+        archive.append([{"url": "b"}])
+        reopened = JsonlArchive(tmp_path / "archive", key_func=lambda r: r["url"])
+        assert set(reopened.keys) == {"a", "b"}
+
+    def test_key_index_rebuilt_after_interrupted_append(self, tmp_path):
+        archive = JsonlArchive(tmp_path / "archive", key_func=lambda r: r["url"])
+        archive.append([{"url": "a"}])
+
+        # Simulate an append interrupted after the manifest was saved
+        archive.keys.replace(["a"], 0)
+
+        reopened = JsonlArchive(tmp_path / "archive", key_func=lambda r: r["url"])
+        assert set(reopened.keys) == {"a"}
+        assert reopened.keys.num_records == 1
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+class TestCompressedJsonlArchive:
+    @pytest.fixture(autouse=True)
+    def requires_module(self, compression):
+        if compression == "zstd":
+            pytest.importorskip("zstandard")
+
+    def test_appends_read_across_members(self, tmp_path, compression):
+        archive = JsonlArchive(tmp_path / "archive", compression=compression)
+        archive.append([{"url": "a", "raksts": "Ā"}])
+        archive.append([{"url": "b"}, {"url": "c"}])
+
+        reopened = JsonlArchive(tmp_path / "archive", compression=compression)
+        assert len(reopened.manifest["segments"]) == 1
+        assert [r["url"] for r in reopened.iter_records()] == ["a", "b", "c"]
+
+    def test_uncommitted_member_ignored(self, tmp_path, compression):
+        archive = JsonlArchive(tmp_path / "archive", compression=compression)
+        archive.append([{"url": "a"}])
+
+        segment = tmp_path / "archive" / archive.manifest["segments"][0]["name"]
+        with open(segment, "ab") as file:
+            file.write(b"\x00garbage")
+
+        assert list(JsonlArchive(tmp_path / "archive").iter_records()) == [{"url": "a"}]
+
+        archive.append([{"url": "b"}])
+        assert [r["url"] for r in archive.iter_records()] == ["a", "b"]
+
+    def test_mixed_with_uncompressed_segments(self, tmp_path, compression):
+        JsonlArchive(tmp_path / "archive").append([{"url": "a"}])
+        JsonlArchive(tmp_path / "archive", compression=compression).append([{"url": "b"}])
+
+        archive = JsonlArchive(tmp_path / "archive")
+        names = [segment["name"] for segment in archive.manifest["segments"]]
+        assert names[0].endswith(".jsonl")
+        assert not names[1].endswith(".jsonl")
+        assert [r["url"] for r in archive.iter_records()] == ["a", "b"]
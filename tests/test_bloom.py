@@ -0,0 +1,24 @@
+from grabeklis.bloom import BloomFilter
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        urls = [f"https://www.lsm.lv/raksts/{i}/" for i in range(1000)]
+        bloom = BloomFilter.from_iterable(urls, capacity=1000)
+
+        assert all(url in bloom for url in urls)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter.from_iterable((str(i) for i in range(5000)), capacity=5000)
+        false_positives = sum(str(i) in bloom for i in range(5000, 15000))
+
+        assert false_positives / 10000 < 0.03
+
+    def test_save_load(self, tmp_path):
+        bloom = BloomFilter.from_iterable(["a", "b"], capacity=10)
+        bloom.save(tmp_path / "history.bloom")
+
+        loaded = BloomFilter.load(tmp_path / "history.bloom")
+        assert "a" in loaded and "b" in loaded
+        assert loaded.num_items == 2
+        assert loaded.bits == bloom.bits
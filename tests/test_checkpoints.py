@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+from scrapy.http import Headers
+
+from grabeklis.checkpoints import SitemapCheckpoints, sitemap_fingerprint
+
+
+class TestSitemapFingerprint:
+    def test_prefers_etag(self):
+        headers = Headers({"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024"})
+        assert sitemap_fingerprint(headers, b"") == 'etag:"abc"'
+
+    def test_content_hash(self):
+        assert sitemap_fingerprint(Headers(), b"a") != sitemap_fingerprint(Headers(), b"b")
+
+
+class TestSitemapCheckpoints:
+    def test_complete_and_sealed(self, tmp_path):
+        checked = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+        checkpoints = SitemapCheckpoints(tmp_path / "checkpoints.json")
+        checkpoints.update("w1", "sha1:1", True, checked)
+        checkpoints.update("w2", "sha1:2", False, checked)
+        checkpoints.save()
+
+        loaded = SitemapCheckpoints(tmp_path / "checkpoints.json")
+        assert loaded.is_complete("w1", "sha1:1")
+        assert not loaded.is_complete("w1", "sha1:changed")
+        assert not loaded.is_complete("w2", "sha1:2")
+
+        assert loaded.is_sealed("w1", datetime(2024, 1, 7, tzinfo=timezone.utc))
+        assert not loaded.is_sealed("w1", datetime(2024, 2, 7, tzinfo=timezone.utc))
+        assert not loaded.is_sealed("w2", datetime(2024, 1, 7, tzinfo=timezone.utc))
+
+    def test_not_sealed_right_after_estimated_week_end(self, tmp_path):
+        # 2025W01 is estimated to end on January 8th, but runs until the 12th
+        week_end = datetime(2025, 1, 8, 23, 59, 59, tzinfo=timezone.utc)
+
+        checkpoints = SitemapCheckpoints(tmp_path / "checkpoints.json")
+        checkpoints.update("w1", "sha1:1", True, datetime(2025, 1, 10, tzinfo=timezone.utc))
+        assert not checkpoints.is_sealed("w1", week_end)
+
+        checkpoints.update("w1", "sha1:1", True, datetime(2025, 1, 16, tzinfo=timezone.utc))
+        assert checkpoints.is_sealed("w1", week_end)
@@ -0,0 +1,89 @@
+import pytest
+
+from datetime import datetime
+from pathlib import Path
+
+from scrapy.http import HtmlResponse
+
+from grabeklis.extract import (
+    ARTICLE_CATEGORY_RE,
+    is_ignored_url,
+    join_paragraphs,
+    prepare_item_from_response,
+    tidy_string,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def fixture_response(name: str) -> HtmlResponse:
+    path = FIXTURES_DIR / name
+    return HtmlResponse("https://www.lsm.lv/raksts/a1/", body=path.read_bytes(), encoding="utf-8")
+
+
+class TestTidyString:
+    def test_newlines_removed(self):
+        assert tidy_string("Rī\nga") == "Rīga"
+
+    def test_whitespace_collapsed(self):
+        assert tidy_string("  a\xa0–\t b \n ") == "a – b"
+
+    def test_empty(self):
+        with pytest.raises(RuntimeError):
+            tidy_string(" \n\xa0 ")
+
+
+class TestJoinParagraphs:
+    def test_same_as_tidy_concatenation(self):
+        paragraphs = ["\n Pirmais\xa0teikums. ", "Otr\nais", "", "  trešais  "]
+        assert join_paragraphs(paragraphs) == tidy_string(" " + " ".join(paragraphs))
+        assert join_paragraphs(paragraphs) == "Pirmais teikums. Otrais trešais"
+
+    def test_empty(self):
+        with pytest.raises(RuntimeError):
+            join_paragraphs([" ", "\n"])
+
+
+def test_is_ignored_url():
+    assert is_ignored_url("https://www.lsm.lv/raksts/komiksi/karikatura.a1/")
+    assert not is_ignored_url("https://www.lsm.lv/raksts/zinas/latvija/raksts.a2/")
+
+
+def test_category_read_from_raw_page():
+    body = (FIXTURES_DIR / "lsm_article_ignored.html").read_bytes()
+    match = ARTICLE_CATEGORY_RE.search(body)
+
+    assert tidy_string(match.group(1).decode("utf-8")) == "Raidījumi"
+
+
+class TestPrepareItemFromResponse:
+    dt_start = datetime(2024, 3, 15, 12, 0)
+
+    def test_article(self):
+        item = prepare_item_from_response(fixture_response("lsm_article.html"), self.dt_start)
+
+        assert "error" not in item
+        assert item["kategorija"] == "Latvijā"
+        # First time element is the article's, not a related article's
+        assert item["datums"] == "2013-06-05 13:00"
+        assert item["virsraksts"].startswith("Saeima galīgajā lasījumā")
+        assert item["raksts"].startswith("Drošība slimnīca")
+        assert "„" in item["raksts"]  # blockquote
+        assert "Embedded text" not in item["raksts"]
+        assert "Bold only" not in item["raksts"]
+
+    def test_lead_in_paragraphs(self):
+        item = prepare_item_from_response(
+            fixture_response("lsm_article_lead_p.html"), self.dt_start
+        )
+
+        assert "error" not in item
+        assert item["datums"] == "2024-03-14 19:54"
+        assert len(item["kopsavilkums"]) > 0
+
+    def test_ignored_category(self):
+        item = prepare_item_from_response(
+            fixture_response("lsm_article_ignored.html"), self.dt_start
+        )
+
+        assert "ignore list" in item["error"]
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+from datetime import datetime
+
+from grabeklis import settings
+from grabeklis.handlers import ScrapedDataHandler
+from tests.test_extract import FIXTURES_DIR
+from tests.test_validation import ok_item
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROJECT_DIR", str(tmp_path))
+    return ScrapedDataHandler("lsmsitemap")
+
+
+def write_run_file(handler, run_name, file_name, data):
+    run_dir = handler.spider_data_dir / run_name
+    run_dir.mkdir(parents=True, exist_ok=True)
+    with open(run_dir / file_name, "w", encoding="utf-8") as file:
+        if file_name.endswith(".jsonl"):
+            file.writelines(json.dumps(item) + "\n" for item in data)
+        else:
+            json.dump(data, file)
+
+
+class TestArchiveFailedRunItems:
+    def test_dedup_against_archive_and_run(self, handler):
+        failed = [{"url": "a", "error": "e1"}, {"url": "b", "error": "e2"}]
+        write_run_file(handler, "run1", f"{handler.fail_run_prefix}.json", failed)
+        assert handler.archive_failed_run_items("run1") == (2, 0)
+
+        failed = [
+            {"url": "a", "error": "e1"},
+            {"url": "a", "error": "e3"},
+            {"url": "c", "error": "e4"},
+            {"url": "c", "error": "e4"},
+        ]
+        write_run_file(handler, "run2", f"{handler.fail_run_prefix}.json", failed)
+        assert handler.archive_failed_run_items("run2") == (2, 2)
+
+        urls = [item["url"] for item in handler.fail_archive.iter_records()]
+        assert urls == ["a", "b", "a", "c"]
+
+
+class TestArchiveOkRunItems:
+    def test_run_merged_once(self, handler):
+        items = [{"url": "a", "raksts": "x"}, {"url": "a", "raksts": "x"}]
+        write_run_file(handler, "run1", "batch_articles_1.jsonl", items)
+
+        assert handler.archive_ok_run_items("run1") == (1, 1)
+        assert handler.archive_ok_run_items("run1") == (0, 2)
+        assert len(handler.ok_archive) == 1
+
+
+class TestMigrateLegacyArchives:
+    def test_existing_runs_not_archived_again(self, handler):
+        items = [ok_item(url="a")]
+        write_run_file(handler, "20240101120000", "batch_articles_1.jsonl", items)
+        write_run_file(handler, "", handler.ok_legacy_archive_name, items)
+
+        assert handler.migrate_legacy_archives() == {"migrated_ok": 1}
+        assert handler.ok_archive.has_run("20240101120000")
+
+        handler.create_archives_from_scraped_data()
+        assert len(handler.ok_archive) == 1
+
+
+class TestMergeShardRuns:
+    def test_first_shard_wins(self, handler):
+        items = [
+            ok_item(url="a", raksts="Pirmais."),
+            ok_item(url="b"),
+        ]
+        write_run_file(handler, "1_shard00", "batch_articles_1.jsonl", items)
+
+        # Article moved to another week while the shards were crawling
+        items = [ok_item(url="a", raksts="Otrais."), ok_item(url="c")]
+        write_run_file(handler, "1_shard01", "batch_articles_1.jsonl", items)
+        failed = [{"url": "d", "error": "e1"}]
+        write_run_file(handler, "1_shard01", f"{handler.fail_run_prefix}.json", failed)
+
+        info = handler.merge_shard_runs(["1_shard00", "1_shard01"])
+
+        assert info == {
+            "new_in_ok_archive": 3,
+            "skipped_ok_duplicates": 1,
+            "new_in_failed_archive": 1,
+            "skipped_fail_duplicates": 0,
+        }
+        archived = {item["url"]: item["raksts"] for item in handler.ok_archive.iter_records()}
+        assert archived == {"a": "Pirmais.", "b": "Raksts.", "c": "Raksts."}
+
+    def test_resumed_merge(self, handler):
+        write_run_file(handler, "1_shard00", "batch_articles_1.jsonl", [ok_item(url="a")])
+        write_run_file(handler, "1_shard01", "batch_articles_1.jsonl", [ok_item(url="a")])
+
+        # Interrupted after archiving the first shard
+        handler.archive_ok_run_items("1_shard00")
+        info = handler.merge_shard_runs(["1_shard00", "1_shard01"])
+
+        assert info["new_in_ok_archive"] == 0
+        assert info["skipped_ok_duplicates"] == 2
+        assert len(handler.ok_archive) == 1
+
+    def test_nothing_archived_if_a_shard_is_invalid(self, handler):
+        write_run_file(handler, "1_shard00", "batch_articles_1.jsonl", [ok_item(url="a")])
+        write_run_file(handler, "1_shard01", "batch_articles_1.jsonl", [ok_item(raksts="")])
+
+        with pytest.raises(RuntimeError, match="Invalid batch files"):
+            handler.merge_shard_runs(["1_shard00", "1_shard01"])
+
+        assert not handler.ok_archive.exists()
+
+
+class TestReextractArchives:
+    def test_stored_pages_extracted_again(self, handler):
+        fetched = datetime(2024, 3, 15, 12, 0)
+        for name in ("lsm_article.html", "lsm_article_ignored.html"):
+            body = (FIXTURES_DIR / name).read_bytes()
+            handler.raw_store.put(f"https://www.lsm.lv/{name}", body, "utf-8", fetched)
+        handler.raw_store.commit()
+
+        handler.ok_archive.append(
+            [
+                {"url": "https://www.lsm.lv/lsm_article.html", "raksts": "outdated"},
+                {"url": "https://www.lsm.lv/not_stored", "raksts": "kept"},
+            ],
+            "run1",
+        )
+
+        info = handler.reextract_archives(workers=1)
+        assert info == {
+            "kept_ok": 1,
+            "kept_failed": 0,
+            "reextracted_ok": 1,
+            "reextracted_failed": 1,
+        }
+
+        ok = list(handler.ok_archive.iter_records())
+        assert [item["url"] for item in ok] == [
+            "https://www.lsm.lv/not_stored",
+            "https://www.lsm.lv/lsm_article.html",
+        ]
+        assert ok[1]["kategorija"] == "Latvijā"
+        assert handler.ok_archive.has_run("run1")
+
+        (failed,) = handler.fail_archive.iter_records()
+        assert failed["url"] == "https://www.lsm.lv/lsm_article_ignored.html"
+        assert "https://www.lsm.lv/lsm_article_ignored.html" in handler.fail_history
@@ -0,0 +1,31 @@
+import json
+
+from grabeklis.history import UrlHistory
+
+
+class TestUrlHistory:
+    def test_add_and_lookup(self, tmp_path):
+        history = UrlHistory(tmp_path / "history.sqlite3")
+        history.add("a")
+        history.update(["b", "a"])
+        history.close()
+
+        reopened = UrlHistory(tmp_path / "history.sqlite3")
+        assert "a" in reopened
+        assert "c" not in reopened
+        assert len(reopened) == 2
+
+    def test_legacy_import(self, tmp_path):
+        legacy = tmp_path / "_history_ok.json"
+        legacy.write_text(json.dumps(["a", "b"]), encoding="utf-8")
+
+        history = UrlHistory(tmp_path / "history.sqlite3", legacy_path=legacy)
+        assert set(history) == {"a", "b"}
+
+    def test_replace(self, tmp_path):
+        history = UrlHistory(tmp_path / "history.sqlite3")
+        history.update(["a", "b"])
+        history.replace(["c"])
+
+        assert set(history) == {"c"}
+        assert not history.is_empty()
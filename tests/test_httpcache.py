@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+from scrapy import Spider
+from scrapy.http import Request, Response
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.request import RequestFingerprinter
+
+from grabeklis.httpcache import SitemapHttpCacheMiddleware
+
+SITEMAP_URL = "https://www.lsm.lv/assets/sitemap_2023W41.xml"
+
+
+@pytest.fixture
+def crawler(tmp_path):
+    settings = Settings(
+        {
+            "HTTPCACHE_ENABLED": True,
+            "HTTPCACHE_DIR": str(tmp_path / "httpcache"),
+            "HTTPCACHE_POLICY": "grabeklis.httpcache.SitemapCachePolicy",
+        }
+    )
+    # Just what the middleware uses, a real crawler needs a reactor
+    crawler = SimpleNamespace(settings=settings, spider=Spider("test"))
+    crawler.stats = MemoryStatsCollector(crawler)
+    crawler.request_fingerprinter = RequestFingerprinter()
+    crawler.spider.crawler = crawler
+    return crawler
+
+
+@pytest.fixture
+def middleware(crawler):
+    middleware = SitemapHttpCacheMiddleware(crawler.settings, crawler.stats)
+    middleware.spider_opened(crawler.spider)
+    yield middleware
+    middleware.spider_closed(crawler.spider)
+
+
+def download(middleware, crawler, request, status, body=b"", latency=0.5):
+    assert middleware.process_request(request, crawler.spider) is None
+    request.meta["download_latency"] = latency
+
+    headers = {"ETag": '"v1"', "Date": "Mon, 16 Oct 2023 10:00:00 GMT"}
+    response = Response(request.url, status=status, headers=headers, body=body, request=request)
+    return middleware.process_response(request, response, crawler.spider)
+
+
+class TestSitemapHttpCacheMiddleware:
+    def test_not_modified_sitemap_reused(self, middleware, crawler):
+        first = download(middleware, crawler, Request(SITEMAP_URL), 200, b"<urlset/>")
+        assert first.body == b"<urlset/>"
+
+        request = Request(SITEMAP_URL)
+        response = download(middleware, crawler, request, 304)
+
+        assert request.headers[b"If-None-Match"] == b'"v1"'
+        assert response.status == 200
+        assert response.body == b"<urlset/>"
+        assert "cached" in response.flags
+
+        stats = crawler.stats
+        assert stats.get_value("httpcache/not_modified") == 1
+        assert stats.get_value("httpcache/bytes_saved") == len(b"<urlset/>")
+        assert stats.get_value("httpcache/revalidation_latency_max") == 0.5
+
+    def test_changed_sitemap_downloaded(self, middleware, crawler):
+        download(middleware, crawler, Request(SITEMAP_URL), 200, b"<urlset/>")
+        response = download(middleware, crawler, Request(SITEMAP_URL), 200, b"<urlset></urlset>")
+
+        assert response.body == b"<urlset></urlset>"
+        assert crawler.stats.get_value("httpcache/not_modified") is None
+
+    def test_articles_not_cached(self, middleware, crawler):
+        url = "https://www.lsm.lv/raksts/zinas/raksts.a1/"
+        download(middleware, crawler, Request(url), 200, b"<html/>")
+
+        request = Request(url)
+        download(middleware, crawler, request, 200, b"<html/>")
+        assert b"If-None-Match" not in request.headers
+        assert crawler.stats.get_value("httpcache/store") is None
@@ -0,0 +1,26 @@
+import asyncio
+
+from datetime import datetime
+
+from grabeklis.extract import prepare_item_from_response
+from grabeklis.parsing import ProcessParser
+from tests.test_extract import FIXTURES_DIR, fixture_response
+
+
+def test_same_items_as_in_process():
+    dt_start = datetime(2024, 3, 15, 12, 0)
+    responses = [fixture_response(path.name) for path in sorted(FIXTURES_DIR.glob("*.html"))]
+
+    async def extract_all(parser):
+        return await asyncio.gather(
+            *(parser.extract(response, dt_start) for response in responses)
+        )
+
+    parser = ProcessParser(workers=2, max_pending=2)
+    try:
+        items = asyncio.run(extract_all(parser))
+    finally:
+        parser.close()
+
+    expected = [prepare_item_from_response(response, dt_start) for response in responses]
+    assert [dict(item) for item in items] == [dict(item) for item in expected]
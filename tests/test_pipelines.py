@@ -0,0 +1,41 @@
+import pytest
+
+from grabeklis.fileio import find_data_files, iter_records
+from grabeklis.pipelines import RotatingJsonlWriter
+
+
+class TestRotatingJsonlWriter:
+    def test_rotation(self, tmp_path):
+        saved = []
+        writer = RotatingJsonlWriter(
+            tmp_path, "batch", max_items=2, on_close=lambda path, urls: saved.append(urls)
+        )
+        for i in range(5):
+            writer.write({"url": str(i), "raksts": "ā"})
+        writer.close()
+
+        files = find_data_files(tmp_path, "batch")
+        assert len(files) == 3
+        assert saved == [["0", "1"], ["2", "3"], ["4"]]
+
+        records = [record for path in files for record in iter_records(path)]
+        assert [record["url"] for record in records] == ["0", "1", "2", "3", "4"]
+
+    @pytest.mark.parametrize("compression,suffix", [("gzip", ".gz"), ("zstd", ".zst")])
+    def test_compression(self, tmp_path, compression, suffix):
+        if compression == "zstd":
+            pytest.importorskip("zstandard")
+
+        writer = RotatingJsonlWriter(tmp_path, "batch", compression=compression)
+        writer.write({"url": "a", "raksts": "ā"})
+        writer.close()
+
+        (path,) = find_data_files(tmp_path, "batch")
+        assert path.name.endswith(".jsonl" + suffix)
+        assert list(iter_records(path)) == [{"url": "a", "raksts": "ā"}]
+
+    def test_unfinished_file_not_found(self, tmp_path):
+        writer = RotatingJsonlWriter(tmp_path, "batch")
+        writer.write({"url": "a"})
+
+        assert find_data_files(tmp_path, "batch") == []
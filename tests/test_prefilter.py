@@ -0,0 +1,72 @@
+import gzip
+import re
+
+import pytest
+from scrapy.http import Headers
+
+from grabeklis.prefilter import BodyPrefixScanner, StreamDecoder
+
+PATTERN = re.compile(rb"<b>([^<]*)</b>")
+
+
+def chunks(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestStreamDecoder:
+    def test_gzip_chunks(self):
+        data = b"<html>" + b"x" * 1000 + b"</html>"
+        decoder = StreamDecoder.from_headers(Headers({"Content-Encoding": "gzip"}))
+
+        decoded = b"".join(decoder.decode(chunk) for chunk in chunks(gzip.compress(data), 7))
+        assert decoded == data
+
+    def test_identity(self):
+        decoder = StreamDecoder.from_headers(Headers({}))
+        assert decoder.decode(b"abc") == b"abc"
+
+    def test_unsupported(self):
+        assert StreamDecoder.from_headers(Headers({"Content-Encoding": "br"})) is None
+        assert StreamDecoder.from_headers(Headers({"Content-Encoding": ["gzip", "br"]})) is None
+
+
+class TestBodyPrefixScanner:
+    def test_match_across_chunks(self):
+        body = b"<html>" + b"y" * 50 + b"<b>Audio</b>" + b"z" * 100
+        scanner = BodyPrefixScanner(PATTERN, StreamDecoder(), 1000, expected_bytes=len(body))
+
+        matches = [scanner.feed(chunk) for chunk in chunks(body, 10)]
+        found = [match for match in matches if match is not None]
+
+        assert len(found) == 1
+        assert found[0].group(1) == b"Audio"
+        assert scanner.done
+        assert scanner.remaining_bytes == len(body) - 70
+
+    @pytest.mark.parametrize("max_bytes", [20, 100])
+    def test_gives_up_after_max_bytes(self, max_bytes):
+        scanner = BodyPrefixScanner(PATTERN, StreamDecoder(), max_bytes)
+
+        for chunk in chunks(b"x" * 200 + b"<b>Audio</b>", 10):
+            assert scanner.feed(chunk) is None
+
+        assert scanner.done
+
+    def test_searched_bytes_bounded(self):
+        searched = []
+
+        class RecordingPattern:
+            def search(self, data, pos=0):
+                searched.append(len(data) - pos)
+                return PATTERN.search(data, pos)
+
+        body = b"x" * 10_000 + b"<b>Audio</b>"
+        scanner = BodyPrefixScanner(RecordingPattern(), StreamDecoder(), 20_000, max_match_bytes=16)
+
+        matches = []
+        for chunk in chunks(body, 5):
+            matches.append(scanner.feed(chunk))
+            assert len(scanner._tail) <= 16
+
+        assert matches[-1].group(1) == b"Audio"
+        assert sum(searched) <= len(body) + 16 * len(searched)
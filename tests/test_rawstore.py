@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from grabeklis.rawstore import RawPageStore
+
+FETCHED = datetime(2024, 3, 15, 12, 0)
+
+
+class TestRawPageStore:
+    def test_put_and_get(self, tmp_path):
+        store = RawPageStore(tmp_path / "raw")
+        digest = store.put("https://a", "<html>ā</html>".encode("utf-8"), "utf-8", FETCHED)
+        store.close()
+
+        reopened = RawPageStore(tmp_path / "raw")
+        page = reopened.get("https://a")
+        assert page.digest == digest
+        assert page.fetched == FETCHED
+        assert reopened.read(digest).decode(page.encoding) == "<html>ā</html>"
+
+    def test_same_content_stored_once(self, tmp_path):
+        store = RawPageStore(tmp_path / "raw")
+        store.put("https://a", b"<html></html>", "utf-8", FETCHED)
+        store.put("https://b", b"<html></html>", "utf-8", FETCHED)
+
+        assert len(store) == 2
+        assert len(list(store.objects_dir.rglob("*.html*"))) == 1
+
+    def test_url_keeps_latest_page(self, tmp_path):
+        store = RawPageStore(tmp_path / "raw")
+        store.put("https://a", b"old", "utf-8", FETCHED)
+        digest = store.put("https://a", b"new", "utf-8", FETCHED)
+
+        assert [page.digest for page in store] == [digest]
+
+    def test_compression_changed(self, tmp_path):
+        pytest.importorskip("zstandard")
+
+        digest = RawPageStore(tmp_path / "raw", compression="gzip").put(
+            "https://a", b"page", "utf-8", FETCHED
+        )
+
+        store = RawPageStore(tmp_path / "raw", compression="zstd")
+        assert store.read(digest) == b"page"
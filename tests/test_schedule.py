@@ -0,0 +1,121 @@
+import pytest
+
+from datetime import datetime, timedelta
+
+from grabeklis.schedule import (
+    HistoryFrontier,
+    WeekStreak,
+    WeeklySitemapWalk,
+    format_week,
+    parse_week,
+)
+
+
+def week_url(week: int) -> str:
+    return f"https://www.lsm.lv/assets/sitemaps/lsm_2023W{week:02d}.xml"
+
+
+def add_weeks(walk, weeks):
+    for week in weeks:
+        walk.add(week_url(week), datetime(2023, 1, 1) + timedelta(weeks=week))
+
+
+class TestWeeklySitemapWalk:
+    def test_newest_first_in_flight(self):
+        walk = WeeklySitemapWalk(in_flight=2)
+        add_weeks(walk, [3, 10, 7, 1])
+
+        assert walk.next_weeks() == [(0, week_url(10)), (1, week_url(7))]
+        assert walk.next_weeks() == []
+
+        assert walk.done(1, 5) == [(2, week_url(3))]
+        assert walk.done(0, 5) == [(3, week_url(1))]
+        assert walk.done(2, 0) == []
+        assert walk.done(3, 0) == []
+        assert not walk.stopped
+
+    def test_stop_after_empty_weeks(self):
+        walk = WeeklySitemapWalk(in_flight=1, stop_after_empty=2)
+        add_weeks(walk, range(1, 11))
+
+        (rank, url), = walk.next_weeks()
+        for num_new in (3, 0, None, 0):
+            assert not walk.stopped
+            (rank, url), = walk.done(rank, num_new)
+
+        # Weeks 10 and 9 had new articles, 8 failed, 7 was empty
+        assert url == week_url(6)
+        assert walk.done(rank, 0) == []
+        assert walk.stopped
+        assert walk.num_not_requested == 5
+
+    def test_streak_counted_in_week_order(self):
+        walk = WeeklySitemapWalk(in_flight=3, stop_after_empty=2)
+        add_weeks(walk, range(1, 11))
+        walk.next_weeks()
+
+        # The newest week isn't done yet, so its older weeks don't count yet
+        walk.done(1, 0)
+        walk.done(2, 0)
+        assert not walk.stopped
+
+        walk.done(0, 4)
+        assert walk.stopped
+
+    def test_added_twice(self):
+        walk = WeeklySitemapWalk(in_flight=5)
+        add_weeks(walk, [1, 2, 2])
+        walk.next_weeks()
+        add_weeks(walk, [1, 2, 3])
+
+        assert walk.next_weeks() == [(2, week_url(3))]
+
+
+class TestHistoryFrontier:
+    def test_reached_after_known_weeks(self):
+        frontier = HistoryFrontier(weeks=2)
+
+        assert not frontier.add(0, 3, 10)
+        assert not frontier.add(1, 10, 10)
+        assert not frontier.add(2, 9, 10)
+        assert not frontier.add(3, 10, 10)
+        assert frontier.add(4, 0, 0)
+
+    def test_min_known_ratio(self):
+        frontier = HistoryFrontier(weeks=1, min_known_ratio=0.9)
+
+        assert not frontier.add(0, 8, 10)
+        assert frontier.add(1, 9, 10)
+
+    def test_failed_week_breaks_streak(self):
+        frontier = HistoryFrontier(weeks=2)
+
+        frontier.add(0, 10, 10)
+        frontier.add(1, None, None)
+        assert not frontier.add(2, 10, 10)
+
+    def test_disabled(self):
+        frontier = HistoryFrontier(weeks=0)
+
+        assert not any(frontier.add(rank, 10, 10) for rank in range(100))
+
+
+def test_week_streak_any_order():
+    streak = WeekStreak()
+
+    assert streak.add(2, True) == 0
+    assert streak.add(1, True) == 0
+    assert streak.add(0, False) == 2
+    assert streak.add(3, False) == 0
+
+
+class TestParseWeek:
+    def test_round_trip(self):
+        assert parse_week("2023W41") == (2023, 41)
+        assert parse_week("2024W1") == (2024, 1)
+        assert format_week((2024, 1)) == "2024W01"
+
+    @pytest.mark.parametrize("week", ["2023-41", "2023W", "23W41", "2023W413"])
+    def test_invalid(self, week):
+        with pytest.raises(ValueError):
+            parse_week(week)
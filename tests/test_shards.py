@@ -0,0 +1,58 @@
+from grabeklis.shards import shard_command, split_weeks, week_range
+
+
+class TestWeekRange:
+    def test_across_years(self):
+        # 2020 has 53 ISO weeks, 2021 has 52
+        weeks = week_range((2020, 52), (2022, 1))
+
+        assert weeks[:3] == [(2020, 52), (2020, 53), (2021, 1)]
+        assert weeks[-2:] == [(2021, 52), (2022, 1)]
+        assert len(weeks) == 2 + 52 + 1
+
+    def test_empty(self):
+        assert week_range((2023, 2), (2023, 1)) == []
+
+
+class TestSplitWeeks:
+    def test_contiguous_ranges(self):
+        weeks = week_range((2023, 1), (2023, 10))
+
+        assert split_weeks(weeks, 3, last=(2023, 10)) == [
+            ((2023, 1), (2023, 4)),
+            ((2023, 5), (2023, 7)),
+            ((2023, 8), (2023, 10)),
+        ]
+
+    def test_no_gaps_between_years(self):
+        ranges = split_weeks(week_range((2024, 51), (2025, 2)), 2)
+
+        assert ranges == [((2024, 51), (2025, 0)), ((2025, 1), (9999, 99))]
+
+        # Week numbers outside ISO weeks of the year still have a shard
+        for week in [(2024, 53), (2025, 0), (2025, 3), (2026, 0)]:
+            assert sum(first <= week <= last for first, last in ranges) == 1
+
+    def test_more_shards_than_weeks(self):
+        weeks = week_range((2023, 1), (2023, 2))
+
+        assert split_weeks(weeks, 4, last=(2023, 2)) == [
+            ((2023, 1), (2023, 1)),
+            ((2023, 2), (2023, 2)),
+        ]
+        assert split_weeks([], 4) == []
+
+
+def test_shard_command():
+    command = shard_command(
+        "lsmsitemap", "1_shard00", (2023, 1), (2023, 9), "/cache/shard00", ["LOG_LEVEL=INFO"]
+    )
+
+    assert command[1:5] == ["-m", "scrapy", "crawl", "lsmsitemap"]
+    assert command[5:] == [
+        "-a", "week-from=2023W01",
+        "-a", "week-to=2023W09",
+        "-a", "shard=1_shard00",
+        "-s", "HTTPCACHE_DIR=/cache/shard00",
+        "-s", "LOG_LEVEL=INFO",
+    ]  # fmt: skip
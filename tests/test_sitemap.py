@@ -0,0 +1,86 @@
+import pytest
+
+from scrapy.utils.sitemap import Sitemap
+
+from grabeklis.sitemap import StreamingSitemap
+
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:xhtml="http://www.w3.org/1999/xhtml">
+  <!-- comment -->
+  <url>
+    <loc> https://www.lsm.lv/raksts/zinas/latvija/a1/ </loc>
+    <lastmod>2023-10-09T10:00:00+03:00</lastmod>
+    <xhtml:link rel="alternate" hreflang="en" href="https://eng.lsm.lv/article/a1/"/>
+    <xhtml:link rel="alternate" hreflang="ru"/>
+  </url>
+  <url>
+    <lastmod>2023-10-09T11:00:00+03:00</lastmod>
+  </url>
+  <url>
+    <loc>https://www.lsm.lv/raksts/sports/a2/</loc>
+    <lastmod/>
+  </url>
+</urlset>
+"""
+
+SITEMAPINDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://www.lsm.lv/assets/sitemaps/lsm_2023W40.xml</loc></sitemap>
+  <sitemap><loc>https://www.lsm.lv/assets/sitemaps/lsm_2023W41.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+
+def make_urlset(num_urls: int) -> bytes:
+    urls = b"".join(
+        b"<url><loc>https://www.lsm.lv/raksts/a%d/</loc>"
+        b"<lastmod>2023-10-09T10:00:00+03:00</lastmod></url>" % i
+        for i in range(num_urls)
+    )
+    return b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + urls + b"</urlset>"
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        URLSET,
+        SITEMAPINDEX,
+        make_urlset(100),
+        # Truncated download, recovered like Sitemap does
+        make_urlset(10)[:-30],
+    ],
+)
+def test_same_as_sitemap(body):
+    expected = Sitemap(body)
+    sitemap = StreamingSitemap(body)
+
+    assert sitemap.type == expected.type
+    assert list(sitemap) == list(expected)
+
+
+def test_empty_body():
+    sitemap = StreamingSitemap(b"")
+
+    assert sitemap.type is None
+    assert list(sitemap) == []
+
+
+def max_tree_size(num_urls: int) -> int:
+    sitemap = StreamingSitemap(make_urlset(num_urls))
+
+    num_entries = 0
+    max_size = 0
+    for _ in sitemap:
+        num_entries += 1
+        max_size = max(max_size, len(sitemap._root))
+
+    assert num_entries == num_urls
+    return max_size
+
+
+def test_parsed_entries_are_dropped():
+    # The parser reads ahead a chunk at a time, but the tree doesn't
+    # grow with the number of entries
+    assert max_tree_size(20000) <= max_tree_size(2000) < 2000
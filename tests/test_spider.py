@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+from scrapy.http import HtmlResponse, Request, XmlResponse
+from scrapy.settings import Settings
+from scrapy.signalmanager import SignalManager
+from scrapy.statscollectors import MemoryStatsCollector
+
+from grabeklis import settings as project_settings
+from grabeklis.history import UrlHistory
+from grabeklis.schedule import HistoryFrontier
+from grabeklis.spiders.lsm import LSMSitemapSpider
+
+INDEX_URL = "https://www.lsm.lv/sitemap.xml"
+
+
+def week_url(week: int) -> str:
+    return f"https://www.lsm.lv/assets/sitemaps/lsm_2023W{week:02d}.xml"
+
+
+def article_url(name: str) -> str:
+    return f"https://www.lsm.lv/raksts/zinas/latvija/{name}/"
+
+
+def make_index(weeks) -> bytes:
+    sitemaps = "".join(f"<sitemap><loc>{week_url(week)}</loc></sitemap>" for week in weeks)
+    return (
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{sitemaps}</sitemapindex>"
+    ).encode()
+
+
+def make_urlset(names) -> bytes:
+    urls = "".join(
+        f"<url><loc>{article_url(name)}</loc>"
+        "<lastmod>2023-10-09T10:00:00+03:00</lastmod></url>"
+        for name in names
+    )
+    return (
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+    ).encode()
+
+
+def make_spider(tmp_path, **kwargs):
+    settings = Settings(
+        {
+            **{name: getattr(project_settings, name) for name in dir(project_settings)},
+            "SITEMAP_CHECKPOINTS_ENABLED": False,
+            "HISTORY_BLOOM_ENABLED": False,
+            "DT_FROM_AUTO": False,
+            "SITEMAP_STOP_AFTER_EMPTY_WEEKS": 0,
+        }
+    )
+    crawler = SimpleNamespace(settings=settings, signals=SignalManager())
+    crawler.stats = MemoryStatsCollector(crawler)
+
+    spider = LSMSitemapSpider(crawler, **kwargs)
+    spider.history_ok = UrlHistory(tmp_path / "ok.sqlite3")
+    spider.history_failed = UrlHistory(tmp_path / "failed.sqlite3")
+    return spider
+
+
+@pytest.fixture
+def spider(tmp_path):
+    return make_spider(tmp_path)
+
+
+def parse(spider, response) -> list[Request]:
+    return list(spider._parse_sitemap(response))
+
+
+def requested_weeks(requests) -> list[str]:
+    return [request.url for request in requests if "week_rank" in request.meta]
+
+
+def weekly_response(request, body: bytes, cls=XmlResponse):
+    return cls(request.url, body=body, request=request)
+
+
+class TestWeeklySitemapWalk:
+    def test_unparsable_weeks_free_their_slot(self, spider):
+        index = weekly_response(Request(INDEX_URL), make_index(range(1, 6)))
+        week5, week4 = parse(spider, index)
+        assert requested_weeks([week5, week4]) == [week_url(5), week_url(4)]
+
+        # e.g. a maintenance page served with 200
+        page = b"<html><body>Apkope</body></html>"
+        requests = parse(spider, weekly_response(week5, page, HtmlResponse))
+        requests += parse(spider, weekly_response(week4, b""))
+        assert requested_weeks(requests) == [week_url(3), week_url(2)]
+
+        # Sitemap index instead of a urlset
+        requests = parse(spider, weekly_response(requests[0], make_index([1])))
+        assert requested_weeks(requests) == [week_url(1)]
+
+
+class TestHistoryFrontier:
+    def test_failed_urls_count_as_known(self, spider):
+        spider.history_frontier = HistoryFrontier(weeks=1)
+        spider.history_ok.update([article_url("a1")])
+        spider.history_failed.update([article_url("a2")])
+
+        index = weekly_response(Request(INDEX_URL), make_index([1, 2, 3]))
+        week3, _ = parse(spider, index)
+
+        requests = parse(spider, weekly_response(week3, make_urlset(["a1", "a2"])))
+
+        # The failed url is retried, but the week is behind the frontier
+        assert [request.url for request in requests] == [article_url("a2")]
+        assert spider.history_frontier.reached
+        assert spider.crawler.stats.get_value("history/frontier_reached_at") == week_url(3)
+
+
+class TestShard:
+    def test_history_left_to_the_launcher(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(LSMSitemapSpider.raw_store, "commit_every", 100)
+        spider = make_spider(tmp_path, shard="1_shard00")
+
+        spider.batch_saved([article_url("a1")])
+
+        assert article_url("a1") not in spider.history_ok
+
+    def test_history_updated_without_shard(self, spider):
+        spider.batch_saved([article_url("a1")])
+
+        assert article_url("a1") in spider.history_ok
@@ -0,0 +1,26 @@
+import json
+
+from grabeklis import settings
+from grabeklis.stats_collector import find_last_stats, stats_logs_dir
+
+
+def test_find_last_stats(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROJECT_DIR", str(tmp_path))
+
+    logs_dir = stats_logs_dir("lsmsitemap")
+    logs_dir.mkdir(parents=True)
+
+    runs = {
+        "20240105130000": {"finish_reason": "finished", "archived_run": "a"},
+        "20240106130000": {"finish_reason": "shutdown", "archived_run": "b"},
+        "20240107130000": {"finish_reason": "finished"},
+    }
+    for name, stats in runs.items():
+        with open(logs_dir / f"{name}.json", "w") as file:
+            json.dump(stats, file)
+
+    stats = find_last_stats("lsmsitemap", finish_reason="finished", archived_run=None)
+    assert stats["archived_run"] == "a"
+
+    assert find_last_stats("lsmsitemap", finish_reason="cancelled") is None
+    assert find_last_stats("other") is None
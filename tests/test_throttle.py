@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+
+import pytest
+
+from scrapy import Spider
+from scrapy.core.downloader import Slot
+from scrapy.http import Request, Response
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+
+from grabeklis.throttle import AdaptiveConcurrencyMiddleware, ConcurrencyBudget, parse_retry_after
+
+ARTICLE_URL = "https://www.lsm.lv/raksts/zinas/latvija/a1/"
+SITEMAP_URL = "https://www.lsm.lv/assets/sitemap_2023W41.xml"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(b"120") == 120.0
+    assert parse_retry_after(b"Mon, 16 Oct 2023 10:00:30 GMT", now=1697450400.0) == 30.0
+    assert parse_retry_after(b"Mon, 16 Oct 2023 09:00:00 GMT", now=1697450400.0) == 0.0
+    assert parse_retry_after(b"soon") is None
+    assert parse_retry_after(None) is None
+
+
+class TestConcurrencyBudget:
+    def test_fast_lowers_delay_then_raises_concurrency(self):
+        budget = ConcurrencyBudget(concurrency=1, max_concurrency=2, delay=1.0, min_delay=0.5)
+
+        decisions = [budget.on_response(0.1) for _ in range(20)]
+
+        assert [d for d in decisions if d] == ["delay_down", "increase"]
+        assert (budget.concurrency, budget.delay) == (2, 0.5)
+
+    def test_delay_reaches_zero(self):
+        budget = ConcurrencyBudget(concurrency=1, max_concurrency=2, delay=1.0, min_delay=0.0)
+
+        decisions = [budget.on_response(0.1) for _ in range(100)]
+
+        assert decisions.count("increase") == 1
+        assert (budget.concurrency, budget.delay) == (2, 0.0)
+
+    def test_slow_lowers_concurrency_then_raises_delay(self):
+        budget = ConcurrencyBudget(concurrency=2, delay=0.0, target_latency=1.0)
+
+        decisions = [budget.on_response(3.0) for _ in range(10)]
+
+        assert [d for d in decisions if d] == ["decrease", "delay_up"]
+        assert (budget.concurrency, budget.delay) == (1, 1.0)
+
+    def test_single_slow_response_ignored(self):
+        budget = ConcurrencyBudget(delay=0.0, max_concurrency=1, target_latency=1.0)
+
+        decisions = [budget.on_response(latency) for latency in (0.1, 5.0, 0.1, 0.1, 0.1)]
+
+        assert decisions == [None] * 5
+
+    def test_overload_backs_off_once_per_burst(self):
+        budget = ConcurrencyBudget(concurrency=8, delay=0.0, max_delay=60.0)
+
+        assert budget.on_overload(retry_after=10.0, now=0.0) == "backoff"
+        assert (budget.concurrency, budget.delay) == (4, 10.0)
+
+        assert budget.on_overload(now=5.0) is None
+        assert budget.on_overload(retry_after=3600.0, now=11.0) == "backoff"
+        assert (budget.concurrency, budget.delay) == (2, 60.0)
+
+
+@pytest.fixture
+def crawler():
+    settings = Settings(
+        {
+            "ADAPTIVE_THROTTLE_ENABLED": True,
+            "ADAPTIVE_THROTTLE_BUDGETS": {
+                "sitemap": {"concurrency": 1, "max_concurrency": 1, "delay": 2.0},
+                "article": {"concurrency": 2, "max_concurrency": 8, "delay": 0.0},
+            },
+        }
+    )
+    # Just what the middleware uses, a real crawler needs a reactor
+    downloader = SimpleNamespace(slots={}, per_slot_settings={})
+    crawler = SimpleNamespace(settings=settings, engine=SimpleNamespace(downloader=downloader))
+    crawler.stats = MemoryStatsCollector(crawler)
+    return crawler
+
+
+def download(middleware, request, status=200, latency=0.1, headers=None):
+    spider = Spider("test")
+    assert middleware.process_request(request, spider) is None
+    request.meta["download_latency"] = latency
+
+    response = Response(request.url, status=status, headers=headers, request=request)
+    return middleware.process_response(request, response, spider)
+
+
+class TestAdaptiveConcurrencyMiddleware:
+    def test_separate_slots(self, crawler):
+        middleware = AdaptiveConcurrencyMiddleware(crawler)
+        article = Request(ARTICLE_URL)
+        sitemap = Request(SITEMAP_URL)
+
+        download(middleware, article)
+        download(middleware, sitemap)
+
+        assert article.meta["download_slot"] == "www.lsm.lv/article"
+        assert sitemap.meta["download_slot"] == "www.lsm.lv/sitemap"
+
+        per_slot = crawler.engine.downloader.per_slot_settings
+        assert per_slot["www.lsm.lv/article"] == {"concurrency": 2, "delay": 0.0}
+        assert per_slot["www.lsm.lv/sitemap"] == {"concurrency": 1, "delay": 2.0}
+
+    def test_decisions_applied_and_recorded(self, crawler):
+        middleware = AdaptiveConcurrencyMiddleware(crawler)
+        slot = Slot(concurrency=2, delay=0.0, randomize_delay=False)
+        crawler.engine.downloader.slots["www.lsm.lv/article"] = slot
+
+        for _ in range(5):
+            download(middleware, Request(ARTICLE_URL))
+
+        assert slot.concurrency == 3
+        assert crawler.stats.get_value("throttle/article/increase") == 1
+        assert crawler.stats.get_value("throttle/article/max_concurrency_reached") == 3
+
+        download(middleware, Request(ARTICLE_URL), status=429, headers={"Retry-After": "30"})
+
+        assert (slot.concurrency, slot.delay) == (1, 30.0)
+        assert crawler.stats.get_value("throttle/article/backoff") == 1
+        assert crawler.stats.get_value("throttle/article/retry_after_max") == 30.0
+        assert crawler.stats.get_value("throttle/sitemap/backoff") is None
@@ -1,3 +1,5 @@
+import pytest
+
 from datetime import datetime, timedelta
 
 from grabeklis import utils
@@ -86,3 +88,131 @@ class TestParseDatetime:
         answer = utils.parse_datetime(trial, now)
 
         assert answer == correct
+
+
+class TestParseLastmod:
+    @pytest.mark.parametrize(
+        "lastmod",
+        [
+            "2023-10-09T10:00:00+03:00",
+            "2023-03-26T02:30:00+02:00",
+            "2023-10-09T10:00:00-05:30",
+            "2023-10-09T10:00:00+00:00",
+            "2023-10-09T10:00:00-00:00",
+            "2023-10-09T10:00:00Z",
+            "2023-10-09T10:00:00+0300",
+            "2023-1-9T10:00:00+03:00",
+        ],
+    )
+    def test_same_as_strptime(self, lastmod):
+        correct = datetime.strptime(lastmod, utils.LASTMOD_FORMAT)
+        answer = utils.parse_lastmod(lastmod)
+
+        assert answer == correct
+        assert answer.tzinfo == correct.tzinfo
+        assert answer.utcoffset() == correct.utcoffset()
+
+    @pytest.mark.parametrize(
+        "lastmod",
+        [
+            "2023-10-09",
+            "2023-10-09T10:00:00",
+            "2023-W41-1T10:00:00+03:00",
+            "2023-10-09T10:00:00.5+03:00",
+            "2023-10-09T10:00:00+03:60",
+            "2023-02-29T10:00:00+03:00",
+            "",
+        ],
+    )
+    def test_rejected_like_strptime(self, lastmod):
+        with pytest.raises(ValueError):
+            datetime.strptime(lastmod, utils.LASTMOD_FORMAT)
+
+        with pytest.raises(ValueError):
+            utils.parse_lastmod(lastmod)
+
+
+class TestParseDatetimeCached:
+    # Downloaded just after midnight on new year's day
+    dt = datetime(2024, 1, 1, 0, 5)
+
+    def test_yesterday_year_boundary(self):
+        answer = utils.parse_datetime("Vakar, 23:58", self.dt)
+
+        assert answer == datetime(2023, 12, 31, 23, 58)
+
+    def test_today_lowercase(self):
+        answer = utils.parse_datetime("šodien, 0:01", self.dt)
+
+        assert answer == datetime(2024, 1, 1, 0, 1)
+
+    def test_date_without_year(self):
+        answer = utils.parse_datetime("14. novembris, 17:29", self.dt)
+
+        assert answer == datetime(2024, 11, 14, 17, 29)
+
+    def test_cached_per_day(self):
+        utils._parse_datetime.cache_clear()
+
+        for hour in range(24):
+            utils.parse_datetime("Šodien, 8:30", self.dt.replace(hour=hour))
+
+        info = utils._parse_datetime.cache_info()
+        assert (info.misses, info.hits) == (1, 23)
+
+        # The next day is a different today
+        answer = utils.parse_datetime("Šodien, 8:30", self.dt + timedelta(days=1))
+        assert answer == datetime(2024, 1, 2, 8, 30)
+
+
+class TestParseDatetimes:
+    dt = datetime(2024, 3, 15, 12, 0)
+
+    column = [
+        "Šodien, 8:30",
+        "Vakar, 19:54",
+        "14. novembris, 17:29",
+        "5. jūnijs, 2013, 13:00",
+        "Šodien, 8:30",
+    ]
+
+    def test_same_as_parse_datetime(self):
+        correct = [utils.parse_datetime(datums, self.dt) for datums in self.column]
+
+        assert utils.parse_datetimes(self.column, self.dt) == correct
+
+    def test_series(self):
+        pd = pytest.importorskip("pandas")
+
+        series = pd.Series(self.column, index=[10, 11, 12, 13, 14])
+        answer = utils.parse_datetimes(series, self.dt)
+
+        assert list(answer.index) == [10, 11, 12, 13, 14]
+        assert list(answer) == utils.parse_datetimes(self.column, self.dt)
+
+    def test_download_day_per_row(self):
+        days = [datetime(2024, 3, d, 12, 0) for d in (15, 14, 15, 1, 1)]
+        column = ["Šodien, 8:30", "Šodien, 8:30", "Vakar, 19:54", "Vakar, 19:54", "Šodien, 8:30"]
+
+        assert utils.parse_datetimes(column, days) == [
+            datetime(2024, 3, 15, 8, 30),
+            datetime(2024, 3, 14, 8, 30),
+            datetime(2024, 3, 14, 19, 54),
+            datetime(2024, 2, 29, 19, 54),
+            datetime(2024, 3, 1, 8, 30),
+        ]
+
+    def test_download_day_per_row_series(self):
+        pd = pytest.importorskip("pandas")
+
+        days = [datetime(2024, 3, d, 12, 0) for d in (15, 14, 13, 12, 11)]
+        series = pd.Series(self.column, index=[10, 11, 12, 13, 14], name="datums")
+        answer = utils.parse_datetimes(series, pd.Series(pd.to_datetime(days), index=series.index))
+
+        assert list(answer.index) == [10, 11, 12, 13, 14]
+        assert answer.name == "datums"
+        assert list(answer) == [utils.parse_datetime(s, d) for s, d in zip(self.column, days)]
+
+    def test_download_days_must_match_rows(self):
+        with pytest.raises(ValueError):
+            utils.parse_datetimes(self.column, [self.dt])
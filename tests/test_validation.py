@@ -0,0 +1,138 @@
+import json
+
+import pytest
+
+from grabeklis import settings
+from grabeklis.handlers import ScrapedDataHandler
+from grabeklis.validation import (
+    find_batch_files,
+    format_problems,
+    ok_record_problems,
+    validate_batch_file,
+    validate_batch_files,
+)
+
+
+def ok_item(**fields):
+    item = {
+        "url": "https://www.lsm.lv/raksts/zinas/latvija/a1/",
+        "datums": "2013-06-05 13:00",
+        "kategorija": "Latvijā",
+        "virsraksts": "Virsraksts",
+        "kopsavilkums": "Kopsavilkums",
+        "raksts": "Raksts.",
+    }
+    item.update(fields)
+    return item
+
+
+def write_batch(path, items):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.writelines(json.dumps(item) + "\n" for item in items)
+    return path
+
+
+class TestOkRecordProblems:
+    def test_valid(self):
+        assert ok_record_problems(ok_item()) == []
+
+    @pytest.mark.parametrize(
+        "fields, problem",
+        [
+            ({"datums": "5. jūnijs, 2013, 13:00"}, "invalid datums"),
+            ({"kategorija": "Nezināma"}, "unknown kategorija"),
+            ({"virsraksts": ""}, "empty virsraksts"),
+            ({"kopsavilkums": ""}, "empty kopsavilkums"),
+            ({"raksts": ""}, "empty raksts"),
+            ({"raksts": None}, "missing raksts"),
+            ({"raksts": float("nan")}, "missing raksts"),
+            ({"raksts": " \n"}, "empty raksts"),
+            ({"raksts": 0}, "invalid raksts"),
+            ({"virsraksts": ["Virsraksts"]}, "invalid virsraksts"),
+            ({"kategorija": ["Latvijā"]}, "unknown kategorija"),
+            ({"error": "ValueError"}, "keys"),
+        ],
+    )
+    def test_invalid(self, fields, problem):
+        problems = ok_record_problems(ok_item(**fields))
+
+        assert len(problems) == 1
+        assert problems[0].startswith(problem)
+
+    def test_missing_key(self):
+        item = ok_item()
+        del item["datums"]
+
+        assert ok_record_problems(item)[0].startswith("keys")
+
+
+class TestValidateBatchFile:
+    def test_problems_with_line_numbers(self, tmp_path):
+        items = [ok_item(), ok_item(raksts=""), ok_item(), ok_item(kategorija="X", virsraksts="")]
+        path = write_batch(tmp_path / "batch_articles_1.jsonl", items)
+
+        result = validate_batch_file(path, "ok")
+
+        assert not result.ok
+        assert (result.num_records, result.num_invalid) == (4, 2)
+        assert result.problems == [
+            (2, "empty raksts"),
+            (4, "unknown kategorija 'X'"),
+            (4, "empty virsraksts"),
+        ]
+        assert "2/4 invalid records" in format_problems([result])
+
+    def test_failed_items(self, tmp_path):
+        items = [{"url": "a", "error": "e"}, {"url": "b"}]
+        path = write_batch(tmp_path / "run_failed_items.jsonl", items)
+
+        result = validate_batch_file(path, "failed")
+
+        assert (result.num_records, result.num_invalid) == (2, 1)
+
+
+def test_parallel_same_as_serial(tmp_path):
+    run_dir = tmp_path / "lsmsitemap" / "20240315120000"
+    for i in range(3):
+        write_batch(run_dir / f"batch_articles_{i}.jsonl", [ok_item(), ok_item(raksts="")])
+    write_batch(run_dir / "run_failed_items.jsonl", [{"url": "a", "error": "e"}])
+
+    ok_paths, failed_paths = find_batch_files(
+        tmp_path,
+        "lsmsitemap",
+        "20240315120000",
+        batch_prefix="batch_articles",
+        fail_run_prefix="run_failed_items",
+    )
+    assert (len(ok_paths), len(failed_paths)) == (3, 1)
+
+    serial = validate_batch_files(ok_paths, failed_paths, workers=1)
+    parallel = validate_batch_files(ok_paths, failed_paths, workers=2)
+
+    assert parallel == serial
+    assert [result.ok for result in serial] == [False, False, False, True]
+
+
+class TestAddScrapedDataToArchives:
+    @pytest.fixture
+    def handler(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "PROJECT_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "VALIDATION_WORKERS", 1)
+        return ScrapedDataHandler("lsmsitemap")
+
+    def test_valid_run_archived(self, handler):
+        write_batch(handler.spider_data_dir / "run1" / "batch_articles_1.jsonl", [ok_item()])
+
+        info = handler.add_scraped_data_to_archives("run1")
+
+        assert info["new_in_ok_archive"] == 1
+
+    def test_invalid_run_not_archived(self, handler):
+        items = [ok_item(), ok_item(datums="")]
+        write_batch(handler.spider_data_dir / "run1" / "batch_articles_1.jsonl", items)
+
+        with pytest.raises(RuntimeError, match="line 2: invalid datums"):
+            handler.add_scraped_data_to_archives("run1")
+
+        assert not handler.ok_archive.exists()